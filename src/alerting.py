@@ -0,0 +1,292 @@
+import queue
+import threading
+import time
+from src.utils.logger import get_logger
+from src.concurrency import TokenBucket
+
+
+class LogChannel:
+    """
+    Writes alerts to the application log (the default channel).
+    """
+
+    def __init__(self, **options):
+        self.name = options.get('name', 'log')
+        self.logger = get_logger("Alerts")
+
+    def send(self, events):
+        for e in events:
+            if e['state'] == 'DOWN':
+                self.logger.critical(f"ALERT: Service {e['service']} is DOWN! Msg: {e['message']}")
+            else:
+                self.logger.info(f"RECOVERED: Service {e['service']} is back UP. Msg: {e['message']}")
+
+
+class WebhookChannel:
+    """
+    POSTs one JSON document per alert group to a webhook (Slack/Teams relay,
+    incident tooling, ...).
+    """
+
+    def __init__(self, url, timeout=5, headers=None, **options):
+        self.name = options.get('name', url)
+        self.url = url
+        self.timeout = timeout
+        self.headers = headers or {}
+
+    def send(self, events):
+        import requests # Only needed when a webhook is configured
+        down = sum(1 for e in events if e['state'] == 'DOWN')
+        payload = {
+            "summary": f"{down} service(s) DOWN, {len(events) - down} recovered",
+            "alerts": events
+        }
+        response = requests.post(self.url, json=payload, headers=self.headers, timeout=self.timeout)
+        response.raise_for_status()
+
+
+CHANNEL_TYPES = {
+    'log': LogChannel,
+    'webhook': WebhookChannel,
+}
+
+
+class _ChannelWorker:
+    """
+    Delivers alert groups to one channel on its own thread, so a throttled
+    or failing channel never holds up the others. Groups that queue up while
+    the channel waits for its rate limit (or retries) are coalesced into one
+    notification.
+    """
+
+    def __init__(self, channel, limiter, retries, queue_size, logger):
+        self.channel = channel
+        self.limiter = limiter
+        self.retries = retries
+        self.logger = logger
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"alert-channel-{self.channel.name}",
+                                            daemon=True)
+            self._thread.start()
+
+    def put(self, group):
+        try:
+            self._queue.put_nowait(group)
+        except queue.Full:
+            self.dropped += len(group)
+            self.logger.warning(f"Alert channel {self.channel.name} backlog full, dropped {len(group)} "
+                                f"alert(s) ({self.dropped} dropped so far)")
+
+    def _run(self):
+        while True:
+            group = self._queue.get()
+            if group is None:
+                return
+            if self.limiter is not None:
+                self.limiter.acquire()
+            stop = False
+            while True:
+                try:
+                    nxt = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                group = group + nxt
+            self._send(group)
+            if stop:
+                return
+
+    def _send(self, group):
+        for attempt in range(self.retries + 1):
+            try:
+                self.channel.send(group)
+                return
+            except Exception as e:
+                if attempt == self.retries:
+                    self.logger.error(f"Alert channel {self.channel.name} failed after "
+                                      f"{self.retries + 1} attempts: {e}")
+                else:
+                    time.sleep(min(30, 0.5 * (2 ** attempt)))
+
+    def close(self, deadline):
+        """Flushes the backlog until `deadline` (time.monotonic()) and stops the thread."""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=max(0, deadline - time.monotonic()))
+        except queue.Full:
+            self.logger.warning(f"Alert channel {self.channel.name} still busy at shutdown, "
+                                f"abandoning its backlog")
+            return
+        self._thread.join(max(0, deadline - time.monotonic()))
+
+
+class AlertDispatcher:
+    """
+    Asynchronous alert pipeline.
+
+    submit() is called from check threads and never blocks: it compares the
+    result with the service's previous state and only enqueues transitions
+    (new outage -> DOWN, end of outage -> RECOVERED), so an outage alerts
+    once instead of every cycle. A dispatcher thread drains the bounded
+    queue and groups events arriving within `group_window` seconds into one
+    notification. Each channel delivers on its own thread with its own
+    backlog, honouring its rate limit and retrying failed sends with
+    backoff; a throttled channel coalesces its backlog instead of delaying
+    the other channels.
+
+    Config (the `alerting` section of services.yaml):
+        group_window: 2          # seconds to gather simultaneous failures
+        queue_size: 1000         # events (and groups per channel) beyond this are dropped
+        channels:
+          - type: log
+          - type: webhook
+            url: https://hooks.example.com/monitor
+            rate_per_minute: 6   # token bucket per channel
+            burst: 3
+            retries: 3
+    """
+
+    def __init__(self, channels=None, group_window=2.0, queue_size=1000, max_group=500):
+        self.logger = get_logger("AlertDispatcher")
+        self.group_window = group_window
+        self.max_group = max_group
+        self.queue_size = queue_size
+        self.channels = [] # _ChannelWorker per channel
+        for spec in channels or [{"type": "log"}]:
+            self.add_channel(spec)
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._states = {} # Key: ServiceName, Value: last alert state (True = up)
+        self._state_lock = threading.Lock()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        config = config or {}
+        return cls(channels=config.get('channels'),
+                   group_window=config.get('group_window', 2.0),
+                   queue_size=config.get('queue_size', 1000))
+
+    def add_channel(self, spec):
+        """
+        Adds a channel from a config dict ({type: ..., rate_per_minute, burst, retries, ...})
+        or a ready object with a send(events) method.
+        """
+        if isinstance(spec, dict):
+            options = dict(spec)
+            s_type = options.pop('type', 'log')
+            rate = options.pop('rate_per_minute', None)
+            burst = options.pop('burst', 1)
+            retries = options.pop('retries', 3)
+            channel_cls = CHANNEL_TYPES.get(s_type)
+            if channel_cls is None:
+                raise ValueError(f"Unknown alert channel type '{s_type}'")
+            channel = channel_cls(**options)
+        else:
+            channel, rate, burst, retries = spec, None, 1, 3
+        limiter = TokenBucket(rate / 60.0, burst) if rate else None
+        self.channels.append(_ChannelWorker(channel, limiter, retries, self.queue_size, self.logger))
+
+    # --- Producer side (check threads) ---
+
+    def submit(self, result):
+        """
+        Records a check result and enqueues an alert if the service changed
+        state. Never blocks.
+        """
+        name = result['name']
+        up = bool(result['status'])
+        with self._state_lock:
+            previous = self._states.get(name)
+            if previous == up or (previous is None and up):
+                self._states[name] = up
+                return # No transition (or first sighting of a healthy service)
+
+            event = {
+                "service": name,
+                "type": result.get('type'),
+                "state": "RECOVERED" if up else "DOWN",
+                "message": result.get('message'),
+                "timestamp": result.get('timestamp', time.time())
+            }
+            self._ensure_thread()
+            # The state only moves once its alert is queued, so a transition
+            # dropped on a full queue is alerted by the next result instead.
+            try:
+                self._queue.put_nowait(event)
+                self._states[name] = up
+                return
+            except queue.Full:
+                self.dropped += 1
+        self.logger.warning(f"Alert queue full, dropped alert for {name} ({self.dropped} dropped so far)")
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                for worker in self.channels:
+                    worker.start()
+                self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+                self._thread.start()
+
+    # --- Consumer side (dispatcher thread) ---
+
+    def _run(self):
+        while True:
+            event = self._queue.get()
+            if event is None:
+                return
+            group = [event]
+            stop = False
+            deadline = time.monotonic() + self.group_window
+            while len(group) < self.max_group:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                group.append(nxt)
+
+            self._deliver(group)
+            if stop:
+                return
+
+    def _deliver(self, group):
+        for worker in self.channels:
+            worker.put(group)
+
+    def close(self, timeout=10):
+        """
+        Flushes queued alerts and stops the dispatcher and channel threads,
+        waiting at most `timeout` seconds in total. Channels still throttled
+        or retrying by then are abandoned (their threads are daemons).
+        """
+        with self._thread_lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None:
+            return
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            self.logger.warning("Alert queue still full at shutdown, abandoning queued alerts")
+            return
+        thread.join(max(0, deadline - time.monotonic()))
+        for worker in self.channels:
+            worker.close(deadline)
@@ -0,0 +1,202 @@
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from urllib.parse import urlparse
+
+
+@lru_cache(maxsize=4096)
+def _host_from_url(url):
+    try:
+        return urlparse(url).hostname
+    except ValueError:
+        return None
+
+
+def get_host(service):
+    """
+    Returns the backend host a service is probed on (explicit `host`, else
+    the hostname of its url/wsdl), used to group probes for host limits.
+    """
+    host = service.get('host')
+    if host:
+        return str(host).lower()
+    url = service.get('url') or service.get('wsdl')
+    if url:
+        host = _host_from_url(url)
+    return host or 'unknown'
+
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to `capacity` tokens, refilled at `rate`
+    tokens per second. acquire() blocks until a token is available.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class ConcurrencyLimiter:
+    """
+    Caps how many probes run at once per backend host and per service type,
+    and optionally how many probes may start per second per host.
+
+    Config (the `limits` section of services.yaml):
+        per_host: 8               # concurrent probes per host (0/None = unlimited)
+        per_host_rate: 20         # probe starts per second per host (token bucket)
+        per_type: {SOAP: 10}      # concurrent probes per service type
+    """
+
+    def __init__(self, per_host=8, per_host_rate=None, per_type=None):
+        self.per_host = per_host
+        self.per_host_rate = per_host_rate
+        self.per_type = {k.upper(): v for k, v in (per_type or {}).items()}
+        self._host_slots = {}
+        self._type_slots = {}
+        self._host_rates = {}
+        self._lock = threading.Lock()
+
+    def _get(self, table, key, factory):
+        item = table.get(key)
+        if item is None:
+            with self._lock:
+                item = table.get(key)
+                if item is None:
+                    item = table[key] = factory()
+        return item
+
+    @contextmanager
+    def slot(self, service):
+        """
+        Holds the host and type slots for the duration of one probe.
+        """
+        host = get_host(service)
+        s_type = str(service.get('type', '')).upper()
+        held = []
+        try:
+            type_limit = self.per_type.get(s_type)
+            if type_limit:
+                sem = self._get(self._type_slots, s_type, lambda: threading.BoundedSemaphore(type_limit))
+                sem.acquire()
+                held.append(sem)
+            if self.per_host:
+                sem = self._get(self._host_slots, host, lambda: threading.BoundedSemaphore(self.per_host))
+                sem.acquire()
+                held.append(sem)
+            if self.per_host_rate:
+                self._get(self._host_rates, host, lambda: TokenBucket(self.per_host_rate)).acquire()
+            yield
+        finally:
+            for sem in reversed(held):
+                sem.release()
+
+    @staticmethod
+    def interleave_by_host(services):
+        """
+        Reorders services round-robin across hosts so a pool does not fill up
+        with probes queued behind the same host limit.
+        """
+        groups = {}
+        for s in services:
+            groups.setdefault(get_host(s), []).append(s)
+        ordered = []
+        queues = list(groups.values())
+        i = 0
+        while queues:
+            q = queues[i % len(queues)]
+            ordered.append(q.pop(0))
+            if not q:
+                queues.remove(q)
+            else:
+                i += 1
+        return ordered
+
+
+class AdaptivePoolSizer:
+    """
+    AIMD sizing of the check worker pool.
+
+    After every batch, the observed probe latency and pool queue wait are fed
+    back: if latency rises well above its moving baseline (backends are
+    saturating) the pool is halved; if checks spent a noticeable share of
+    their time waiting for a free worker, the pool grows additively - unless
+    workers were themselves blocked on host/type limits, in which case more
+    threads would only wait too.
+
+    Only successful probes count, and each host is compared with its own
+    baseline; the pool shrinks when the median host slowed down, so one
+    dead or slow backend (or a slow dependency layer) is not mistaken for
+    congestion.
+    """
+
+    def __init__(self, min_workers=2, max_workers=32, initial=10, increase_step=2,
+                 decrease_factor=0.5, latency_tolerance=1.5, wait_ratio=0.1):
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.size = max(min_workers, min(initial, max_workers))
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.wait_ratio = wait_ratio
+        self.baselines = {} # Key: host, Value: moving latency baseline
+        self._lock = threading.Lock()
+
+    def workers_for(self, n_tasks):
+        return max(1, min(self.size, n_tasks))
+
+    def observe(self, latencies, queue_waits, pool_size, limit_waits=()):
+        """
+        Updates the pool size from one batch's successful probe latencies as
+        (host, seconds) pairs, pool queue waits and time spent waiting for
+        host/type slots (all in seconds).
+        """
+        if not latencies:
+            return self.size
+        by_host = {}
+        for host, latency in latencies:
+            by_host.setdefault(host, []).append(latency)
+        avg_latency = sum(latency for _, latency in latencies) / len(latencies)
+        avg_wait = sum(queue_waits) / len(queue_waits) if queue_waits else 0.0
+        avg_limit_wait = sum(limit_waits) / len(limit_waits) if limit_waits else 0.0
+        threshold = self.wait_ratio * max(avg_latency, 0.001)
+
+        with self._lock:
+            ratios = []
+            for host, values in by_host.items():
+                host_latency = sum(values) / len(values)
+                baseline = self.baselines.get(host)
+                if baseline is None:
+                    baseline = host_latency
+                else:
+                    ratios.append(host_latency / max(baseline, 0.001))
+                # Slow-moving baseline so a sustained shift becomes the new normal
+                self.baselines[host] = 0.8 * baseline + 0.2 * host_latency
+            ratios.sort()
+            median = ratios[(len(ratios) - 1) // 2] if ratios else 1.0 # Lower median
+
+            if median > self.latency_tolerance and self.size > self.min_workers:
+                self.size = max(self.min_workers, int(self.size * self.decrease_factor))
+            elif pool_size >= self.size and avg_wait > threshold and avg_limit_wait <= threshold:
+                # Only grow when the batch actually used the whole pool
+                self.size = min(self.max_workers, self.size + self.increase_step)
+            return self.size
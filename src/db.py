@@ -1,4 +1,5 @@
 import sqlite3
+import json
 import time
 import os
 from src.utils.logger import get_logger
@@ -32,6 +33,10 @@ class Database:
                 )
             ''')
 
+            # Range scans for charts/exports (per service, and across services)
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_service_ts ON history (service_name, timestamp)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_ts ON history (timestamp)')
+
             # Create services table (v2.0)
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS services (
@@ -43,28 +48,109 @@ class Database:
                     active INTEGER DEFAULT 1
                 )
             ''')
+
+            # v2.1: upstream dependencies (JSON list of service names)
+            columns = {row[1] for row in cursor.execute("PRAGMA table_info(services)")}
+            if 'depends_on' not in columns:
+                cursor.execute("ALTER TABLE services ADD COLUMN depends_on TEXT")
+
+            # Materialized current state: one row per service, kept up to date
+            # by save_result() in the same transaction as the history insert.
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS latest_status (
+                    service_name TEXT PRIMARY KEY,
+                    type TEXT,
+                    status INTEGER NOT NULL,
+                    response_time REAL NOT NULL,
+                    sla_status TEXT,
+                    ai_score REAL,
+                    message TEXT,
+                    updated_at REAL NOT NULL,
+                    last_change REAL NOT NULL,
+                    consecutive_failures INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
             
             conn.commit()
             conn.close()
         except Exception as e:
             self.logger.error(f"Database initialization failed: {e}")
 
-    def save_result(self, result):
+    def save_result(self, result, history=True):
         """
-        Save a single health check result.
+        Save a single health check result and update the service's
+        latest_status row atomically. With history=False (e.g. suppressed
+        checks) only latest_status is updated. UNKNOWN results (the service
+        was not checked) keep the stored verdict: only sla_status, message
+        and updated_at change.
         """
         try:
             conn = self._get_connection()
             cursor = conn.cursor()
+            status = 1 if result['status'] else 0
             
+            if history:
+                cursor.execute('''
+                    INSERT INTO history (service_name, status, response_time, timestamp)
+                    VALUES (?, ?, ?, ?)
+                ''', (
+                    result['name'],
+                    status,
+                    result['response_time'],
+                    result['timestamp']
+                ))
+
+            if result.get('sla_status') == 'UNKNOWN':
+                cursor.execute('''
+                    INSERT INTO latest_status (service_name, type, status, response_time, sla_status,
+                                               message, updated_at, last_change)
+                    VALUES (?, ?, 0, 0, 'UNKNOWN', ?, ?, ?)
+                    ON CONFLICT(service_name) DO UPDATE SET
+                        sla_status = excluded.sla_status,
+                        message = excluded.message,
+                        updated_at = excluded.updated_at
+                ''', (
+                    result['name'],
+                    result.get('type'),
+                    result.get('message'),
+                    result['timestamp'],
+                    result['timestamp']
+                ))
+                conn.commit()
+                conn.close()
+                return
+
+            # last_change only moves when UP/DOWN flips; suppressed results
+            # neither add to nor reset the failure streak.
             cursor.execute('''
-                INSERT INTO history (service_name, status, response_time, timestamp)
-                VALUES (?, ?, ?, ?)
+                INSERT INTO latest_status (service_name, type, status, response_time, sla_status, ai_score,
+                                           message, updated_at, last_change, consecutive_failures)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(service_name) DO UPDATE SET
+                    type = excluded.type,
+                    status = excluded.status,
+                    response_time = excluded.response_time,
+                    sla_status = excluded.sla_status,
+                    ai_score = excluded.ai_score,
+                    message = excluded.message,
+                    updated_at = excluded.updated_at,
+                    last_change = CASE WHEN latest_status.status = excluded.status
+                                       THEN latest_status.last_change ELSE excluded.updated_at END,
+                    consecutive_failures = CASE
+                        WHEN excluded.sla_status = 'SUPPRESSED' THEN latest_status.consecutive_failures
+                        WHEN excluded.status = 0 THEN latest_status.consecutive_failures + 1
+                        ELSE 0 END
             ''', (
                 result['name'],
-                1 if result['status'] else 0,
+                result.get('type'),
+                status,
                 result['response_time'],
-                result['timestamp']
+                result.get('sla_status'),
+                result.get('ai_score'),
+                result.get('message'),
+                result['timestamp'],
+                result['timestamp'],
+                0 if status or result.get('sla_status') == 'SUPPRESSED' else 1
             ))
             
             conn.commit()
@@ -111,38 +197,348 @@ class Database:
             self.logger.error(f"Failed to get history for {service_name}: {e}")
             return []
 
+    def get_history_series(self, service_name, start, end, max_rows=1000):
+        """
+        Returns one service's history in [start, end) as (timestamp,
+        response_time, status_min, status_max, up_count, samples) tuples.
+
+        If the range holds more than `max_rows` checks, they are rolled up in
+        SQL into `max_rows` equal time buckets (peak latency and its
+        timestamp, min/max status, UP count) so the result size is bounded
+        whatever the range. Both queries are served by idx_history_service_ts.
+        """
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT COUNT(*) FROM history
+                WHERE service_name = ? AND timestamp >= ? AND timestamp < ?
+            ''', (service_name, start, end))
+            count = cursor.fetchone()[0]
+
+            if count <= max_rows:
+                cursor.execute('''
+                    SELECT timestamp, response_time, status, status, status, 1
+                    FROM history
+                    WHERE service_name = ? AND timestamp >= ? AND timestamp < ?
+                    ORDER BY timestamp ASC
+                ''', (service_name, start, end))
+            else:
+                width = (end - start) / max_rows
+                # The peak row of each bucket is picked explicitly (ROW_NUMBER),
+                # so its timestamp really belongs to the peak latency.
+                cursor.execute('''
+                    SELECT timestamp, response_time, status_min, status_max, up_count, samples
+                    FROM (
+                        SELECT timestamp, response_time,
+                               MIN(status) OVER bucket AS status_min,
+                               MAX(status) OVER bucket AS status_max,
+                               SUM(status) OVER bucket AS up_count,
+                               COUNT(*) OVER bucket AS samples,
+                               ROW_NUMBER() OVER (bucket ORDER BY response_time DESC, timestamp ASC) AS rank
+                        FROM (
+                            SELECT timestamp, response_time, status,
+                                   CAST((timestamp - ?) / ? AS INTEGER) AS bucket_id
+                            FROM history
+                            WHERE service_name = ? AND timestamp >= ? AND timestamp < ?
+                        )
+                        WINDOW bucket AS (PARTITION BY bucket_id)
+                    )
+                    WHERE rank = 1
+                    ORDER BY timestamp ASC
+                ''', (start, width, service_name, start, end))
+            rows = cursor.fetchall()
+            conn.close()
+            return rows
+        except Exception as e:
+            self.logger.error(f"Failed to get history series for {service_name}: {e}")
+            return []
+
+    def get_sli_buckets(self, width, start):
+        """
+        Returns per service SLI counters of the checks since `start`, rolled
+        up in SQL into time buckets of `width` seconds, as (service_name,
+        bucket_index, checks, up, fast) tuples ordered by service and bucket.
+
+        bucket_index is timestamp // width; `fast` counts UP checks within
+        the service's SLA threshold (1.0s for services not in the table).
+        """
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT h.service_name, CAST(h.timestamp / ? AS INTEGER) AS bucket_id,
+                       COUNT(*), SUM(h.status),
+                       SUM(h.status AND h.response_time <= COALESCE(s.sla_threshold, 1.0))
+                FROM history h
+                LEFT JOIN services s ON s.name = h.service_name
+                WHERE h.timestamp >= ?
+                GROUP BY h.service_name, bucket_id
+                ORDER BY h.service_name, bucket_id
+            ''', (width, start))
+            rows = cursor.fetchall()
+            conn.close()
+            return rows
+        except Exception as e:
+            self.logger.error(f"Failed to get SLI buckets: {e}")
+            return []
+
+    def iter_history(self, start=None, end=None, services=None, batch_size=1000):
+        """
+        Streams history rows as (service_name, status, response_time, timestamp)
+        tuples in timestamp order, optionally limited to a time range
+        [start, end) and a list of service names.
+
+        Rows are fetched in batches, so memory use is constant regardless of
+        how many rows match.
+        """
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(end)
+        if services:
+            clauses.append(f"service_name IN ({','.join('?' * len(services))})")
+            params.extend(services)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.arraysize = batch_size
+            cursor.execute(f'''
+                SELECT service_name, status, response_time, timestamp
+                FROM history
+                {where}
+                ORDER BY timestamp ASC
+            ''', params)
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _latest_from_row(row):
+        return {
+            "name": row[0],
+            "type": row[1],
+            "status": bool(row[2]),
+            "response_time": row[3],
+            "sla_status": row[4],
+            "ai_score": row[5],
+            "message": row[6],
+            "timestamp": row[7],
+            "last_change": row[8],
+            "consecutive_failures": row[9]
+        }
+
+    def get_latest_status(self):
+        """
+        Returns the current state of every service from latest_status,
+        shaped like check results (plus last_change / consecutive_failures).
+        """
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT service_name, type, status, response_time, sla_status, ai_score,
+                       message, updated_at, last_change, consecutive_failures
+                FROM latest_status
+                ORDER BY service_name
+            ''')
+            rows = cursor.fetchall()
+            conn.close()
+
+            return [self._latest_from_row(row) for row in rows]
+        except Exception as e:
+            self.logger.error(f"Failed to read latest status: {e}")
+            return []
+
+    def get_latest_status_page(self, page=1, page_size=50):
+        """
+        Returns (results, total, failed): one page of latest_status ordered
+        by service name, plus fleet-wide counts for the dashboard summary.
+        UNKNOWN services (not checked) are not counted as failed.
+        """
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT COUNT(*), COALESCE(SUM(status = 0 AND COALESCE(sla_status, '') != 'UNKNOWN'), 0)
+                FROM latest_status
+            ''')
+            total, failed = cursor.fetchone()
+            cursor.execute('''
+                SELECT service_name, type, status, response_time, sla_status, ai_score,
+                       message, updated_at, last_change, consecutive_failures
+                FROM latest_status
+                ORDER BY service_name
+                LIMIT ? OFFSET ?
+            ''', (page_size, (page - 1) * page_size))
+            rows = cursor.fetchall()
+            conn.close()
+
+            return [self._latest_from_row(row) for row in rows], total, failed
+        except Exception as e:
+            self.logger.error(f"Failed to read latest status page: {e}")
+            return [], 0, 0
+
     # --- v2.0 Service Management Methods ---
 
+    @staticmethod
+    def _service_from_row(row):
+        return {
+            "name": row[0],
+            "type": row[1],
+            "endpoint": row[2],
+            "url": row[2] if row[1] == 'REST' else None, # Simplified mapping
+            "wsdl": row[2] if row[1] == 'SOAP' else None,
+            "queue_name": row[2] if row[1] == 'MQ' else None,
+            "sla_threshold": row[3],
+            "depends_on": json.loads(row[4]) if row[4] else []
+        }
+
     def get_services(self):
         """Fetch all active services."""
         try:
             conn = self._get_connection()
             cursor = conn.cursor()
-            cursor.execute("SELECT name, type, endpoint, sla_threshold FROM services WHERE active=1")
+            cursor.execute("SELECT name, type, endpoint, sla_threshold, depends_on FROM services WHERE active=1")
             rows = cursor.fetchall()
             conn.close()
             
-            services = []
-            for row in rows:
-                services.append({
-                    "name": row[0],
-                    "type": row[1],
-                    "url": row[2] if row[1] == 'REST' else None, # Simplified mapping
-                    "wsdl": row[2] if row[1] == 'SOAP' else None,
-                    "queue_name": row[2] if row[1] == 'MQ' else None,
-                    "sla_threshold": row[3]
-                })
-            return services
+            return [self._service_from_row(row) for row in rows]
         except Exception as e:
             self.logger.error(f"Failed to fetch services: {e}")
             return []
 
-    def add_service(self, name, s_type, endpoint, sla=1.0):
+    def get_services_page(self, page=1, page_size=50, search=None, s_type=None):
+        """
+        Returns (services, total) for one page of active services ordered by
+        name, optionally filtered by a name/endpoint substring and a type.
+        """
+        clauses, params = ["active=1"], []
+        if search:
+            clauses.append("(name LIKE ? OR endpoint LIKE ?)")
+            params.extend([f"%{search}%", f"%{search}%"])
+        if s_type:
+            clauses.append("type = ?")
+            params.append(s_type.upper())
+        where = ' AND '.join(clauses)
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT COUNT(*) FROM services WHERE {where}", params)
+            total = cursor.fetchone()[0]
+            cursor.execute(f'''
+                SELECT name, type, endpoint, sla_threshold, depends_on
+                FROM services
+                WHERE {where}
+                ORDER BY name
+                LIMIT ? OFFSET ?
+            ''', params + [page_size, (page - 1) * page_size])
+            rows = cursor.fetchall()
+            conn.close()
+            return [self._service_from_row(row) for row in rows], total
+        except Exception as e:
+            self.logger.error(f"Failed to fetch services page: {e}")
+            return [], 0
+
+    def iter_services(self, batch_size=500):
+        """
+        Streams active services ordered by name in the import/export shape
+        (name, type, endpoint, sla_threshold, depends_on).
+        """
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.arraysize = batch_size
+            cursor.execute("SELECT name, type, endpoint, sla_threshold, depends_on FROM services WHERE active=1 ORDER BY name")
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                for row in rows:
+                    yield {
+                        "name": row[0],
+                        "type": row[1],
+                        "endpoint": row[2],
+                        "sla_threshold": row[3],
+                        "depends_on": json.loads(row[4]) if row[4] else []
+                    }
+        finally:
+            conn.close()
+
+    def bulk_upsert_services(self, services, dry_run=False):
+        """
+        Creates or updates many services in a single transaction.
+
+        `services` are validated dicts (name, type, endpoint, sla_threshold,
+        depends_on). Returns {"created", "updated", "unchanged"} name lists;
+        with dry_run=True the diff is computed but nothing is written.
+        Returns None if the transaction failed (nothing is written then).
+        """
+        report = {"created": [], "updated": [], "unchanged": []}
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            existing = {}
+            names = [s['name'] for s in services]
+            for i in range(0, len(names), 500): # Stay below SQLite's bound-parameter limit
+                batch = names[i:i + 500]
+                cursor.execute(f'''
+                    SELECT name, type, endpoint, sla_threshold, depends_on, active
+                    FROM services WHERE name IN ({','.join('?' * len(batch))})
+                ''', batch)
+                for row in cursor.fetchall():
+                    existing[row[0]] = (row[1], row[2], row[3], json.loads(row[4]) if row[4] else [], row[5])
+
+            changed = []
+            for s in services:
+                current = existing.get(s['name'])
+                wanted = (s['type'], s['endpoint'], s['sla_threshold'], s['depends_on'], 1)
+                if current is None:
+                    report['created'].append(s['name'])
+                elif current != wanted:
+                    report['updated'].append(s['name'])
+                else:
+                    report['unchanged'].append(s['name'])
+                    continue
+                changed.append((s['name'], s['type'], s['endpoint'], s['sla_threshold'],
+                                json.dumps(s['depends_on']) if s['depends_on'] else None))
+
+            if not dry_run and changed:
+                cursor.executemany('''
+                    INSERT INTO services (name, type, endpoint, sla_threshold, depends_on, active)
+                    VALUES (?, ?, ?, ?, ?, 1)
+                    ON CONFLICT(name) DO UPDATE SET
+                        type = excluded.type,
+                        endpoint = excluded.endpoint,
+                        sla_threshold = excluded.sla_threshold,
+                        depends_on = excluded.depends_on,
+                        active = 1
+                ''', changed)
+                conn.commit()
+            return report
+        except Exception as e:
+            conn.rollback()
+            self.logger.error(f"Bulk service upsert failed: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def add_service(self, name, s_type, endpoint, sla=1.0, depends_on=None):
         try:
             conn = self._get_connection()
             cursor = conn.cursor()
-            cursor.execute("INSERT INTO services (name, type, endpoint, sla_threshold) VALUES (?, ?, ?, ?)", 
-                           (name, s_type, endpoint, sla))
+            cursor.execute("INSERT INTO services (name, type, endpoint, sla_threshold, depends_on) VALUES (?, ?, ?, ?, ?)", 
+                           (name, s_type, endpoint, sla, json.dumps(depends_on) if depends_on else None))
             conn.commit()
             conn.close()
             return True
@@ -155,6 +551,7 @@ class Database:
             conn = self._get_connection()
             cursor = conn.cursor()
             cursor.execute("DELETE FROM services WHERE name=?", (name,))
+            cursor.execute("DELETE FROM latest_status WHERE service_name=?", (name,))
             conn.commit()
             conn.close()
             return True
@@ -0,0 +1,73 @@
+def lttb(xs, ys, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Picks `threshold` points out of the series (xs, ys) that preserve its
+    visual shape: the first and last points are always kept, and from each
+    bucket in between the point forming the largest triangle with the
+    previously selected point and the average of the next bucket.
+
+    Returns (index, bucket_start, bucket_end) tuples, so callers can
+    aggregate other values over the same bucket [bucket_start, bucket_end).
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return [(i, i, i + 1) for i in range(n)]
+
+    every = (n - 2) / (threshold - 2)
+    selected = [(0, 0, 1)]
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+
+        # Average of the next bucket (the last point for the final bucket)
+        next_start = end
+        next_end = min(int((i + 2) * every) + 1, n)
+        span = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / span
+        avg_y = sum(ys[next_start:next_end]) / span
+
+        ax, ay = xs[a], ys[a]
+        best_area = -1.0
+        pick = start
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                pick = j
+        selected.append((pick, start, end))
+        a = pick
+
+    selected.append((n - 1, n - 1, n))
+    return selected
+
+
+def downsample_history(rows, points):
+    """
+    Reduces history rows to at most `points` chart points.
+
+    `rows` are (timestamp, response_time, status_min, status_max, up_count,
+    samples) tuples in time order - raw checks or pre-aggregated buckets (see
+    Database.get_history_series). Latency is downsampled with LTTB; uptime
+    is reported as a min/max envelope over each point's bucket, so a short
+    outage is never averaged away: `status` is False if any check in the
+    bucket was DOWN.
+    """
+    xs = [r[0] for r in rows]
+    ys = [r[1] or 0.0 for r in rows]
+
+    history = []
+    for idx, start, end in lttb(xs, ys, points):
+        bucket = rows[start:end]
+        up = sum(r[4] for r in bucket)
+        samples = sum(r[5] for r in bucket)
+        history.append({
+            "timestamp": xs[idx],
+            "response_time": ys[idx],
+            "status": bool(min(r[2] for r in bucket)),
+            "status_max": bool(max(r[3] for r in bucket)),
+            "availability": round(up / samples, 4) if samples else None,
+            "samples": samples
+        })
+    return history
@@ -1,12 +1,14 @@
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+import time
 from src.utils.logger import get_logger
-from src.monitor.rest_monitor import RestMonitor
-from src.monitor.soap_monitor import SoapMonitor
-from src.monitor.mq_monitor import MqMonitor
-from src.db import Database
-from src.ai_engine import AnomalyDetector
-import concurrent.futures
+from src.monitor.registry import registry as default_registry
+from src.monitor.base import redact_config
+from src.topology import build_layers, get_dependencies
+from src.concurrency import ConcurrencyLimiter, AdaptivePoolSizer, get_host
+from src.alerting import AlertDispatcher
+from src.slo import SloTracker
+import threading
 
 class MonitorEngine:
     """
@@ -14,26 +16,97 @@ class MonitorEngine:
     Supports Parallel Execution.
     """
     
-    def __init__(self, db_path='monitor.db'):
+    def __init__(self, db_path='monitor.db', registry=None, use_db=True, use_ai=True,
+                 suppressed_probe_every=5, limits=None, processes=0, alerting=None, slo=None,
+                 check_interval=60):
         self.logger = get_logger("Engine")
-        self.db = Database()
-        self.thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=10)
-        self.ai = AnomalyDetector() # AI Brain Initialized
+        self.db = None
+        self.ai = None
+        # DB and AI are imported lazily so lean one-shot runs never load them.
+        if use_db:
+            from src.db import Database
+            self.db = Database()
+        if use_ai:
+            from src.ai_engine import AnomalyDetector
+            self.ai = AnomalyDetector() # AI Brain Initialized
+        self.registry = registry or default_registry
+        # Alerts go through an async dispatcher so slow channels never hold up
+        # checks. `alerting` is the config section; False disables alerting.
+        self.alerts = None if alerting is False else AlertDispatcher.from_config(alerting)
+        # Rolling SLO counters, updated here (never in worker processes)
+        self.slo = SloTracker.from_config(slo)
+        self._monitors = {} # Key: ServiceName, Value: constructed monitor
+        self._monitor_lock = threading.Lock()
+        # Concurrency: per-host/per-type limits and an AIMD-sized pool
+        limits = limits or {}
+        self.limiter = ConcurrencyLimiter(per_host=limits.get('per_host', 8),
+                                          per_host_rate=limits.get('per_host_rate'),
+                                          per_type=limits.get('per_type'))
+        self.pool_sizer = AdaptivePoolSizer(min_workers=limits.get('min_workers', 2),
+                                            max_workers=limits.get('max_workers', 32),
+                                            initial=limits.get('initial_workers', 10))
+        # Optional multi-process execution: probes run in worker processes,
+        # DB writes, alerts and scheduling state stay here.
+        self.process_runner = None
+        if processes and processes > 1:
+            from src.process_pool import ShardedProcessRunner
+            worker_limits = dict(limits)
+            if worker_limits.get('per_host', 8):
+                # Keep the per-host cap roughly global across workers
+                worker_limits['per_host'] = max(1, worker_limits.get('per_host', 8) // processes)
+            self.process_runner = ShardedProcessRunner(processes, {"use_ai": use_ai, "limits": worker_limits})
+        # Dependency suppression state
+        self.suppressed_probe_every = suppressed_probe_every # 0 = never probe while upstream is down
+        self.check_interval = check_interval # Seconds between check cycles, paces those probes
+        self._last_status = {} # Key: ServiceName, Value: (status, suppressed_by, last_probed_at)
 
-    def check_service(self, service):
+    def get_monitor(self, service):
+        """
+        Returns the cached monitor for a service, building it on first use or
+        when the service config changed. Raises ValueError on invalid config.
+        """
+        name = service.get('name')
+        monitor = self._monitors.get(name)
+        if monitor is not None and monitor.service_config == service:
+            return monitor
+
+        with self._monitor_lock:
+            monitor = self._monitors.get(name)
+            if monitor is None or monitor.service_config != service:
+                monitor = self.registry.create(dict(service))
+                if monitor is None:
+                    return None
+                self._monitors[name] = monitor
+        return monitor
+
+    def check_service(self, service, alert=True):
         """
         Helper method to check a single service. Designed for threading.
+        With `alert=False` a DOWN result is recorded but no alert is fired.
         """
         s_type = service.get('type').upper()
         monitor = None
 
-        if s_type == 'REST':
-            monitor = RestMonitor(service)
-        elif s_type == 'SOAP':
-            monitor = SoapMonitor(service)
-        elif s_type == 'MQ':
-            monitor = MqMonitor(service)
-        else:
+        try:
+            monitor = self.get_monitor(service)
+        except Exception as e:
+            self.logger.error(f"Invalid configuration for service '{service.get('name')}': {e}")
+            err_result = {
+                "name": service.get('name', 'Unknown'),
+                "type": s_type,
+                "status": False,
+                "response_time": 0,
+                "message": f"Invalid Configuration: {str(e)}",
+                "timestamp": time.time(),
+                "config": redact_config(service),
+                "sla_status": "DOWN"
+            }
+            self._save_result(err_result)
+            if alert:
+                self._trigger_alert(err_result)
+            return err_result
+
+        if monitor is None:
             self.logger.warning(f"Unknown service type '{s_type}' for service '{service.get('name')}'")
             return None
 
@@ -42,7 +115,10 @@ class MonitorEngine:
                 result = monitor.check_health()
                 
                 # --- AI Analysis ---
-                if result['status']: 
+                if result['status'] and self.ai is None:
+                    result['ai_anomaly'] = False
+                    result['ai_message'] = "AI Disabled"
+                elif result['status']:
                     is_anomaly, score, ai_msg = self.ai.analyze(result['name'], result['response_time'])
                     result['ai_anomaly'] = is_anomaly
                     result['ai_score'] = score
@@ -56,7 +132,7 @@ class MonitorEngine:
 
                 # SLA Grading Logic
                 if result['status']:
-                    sla_limit = service.get('sla_threshold', 1.0)
+                    sla_limit = monitor.sla_threshold
                     if result['response_time'] > sla_limit:
                         result['sla_status'] = 'DEGRADED'
                         result['message'] += f" (Slow: >{sla_limit}s)"
@@ -64,9 +140,10 @@ class MonitorEngine:
                         result['sla_status'] = 'HEALTHY'
                 else:
                     result['sla_status'] = 'DOWN'
-                    self._trigger_alert(result) # Alert on DOWN
 
-                self.db.save_result(result)
+                self._save_result(result)
+                if alert or result['status']:
+                    self._trigger_alert(result) # Alerts on DOWN / recovery transitions
                 return result
             except Exception as e:
                 self.logger.error(f"Unexpected error checking {service.get('name')}: {e}")
@@ -76,37 +153,205 @@ class MonitorEngine:
                     "status": False,
                     "response_time": 0,
                     "message": f"Unexpected Error: {str(e)}",
-                    "timestamp": 0,
-                    "config": service,
+                    "timestamp": time.time(),
+                    "config": redact_config(service),
                     "sla_status": "DOWN"
                 }
-                self.db.save_result(err_result)
-                self._trigger_alert(err_result)
+                self._save_result(err_result)
+                if alert:
+                    self._trigger_alert(err_result)
                 return err_result
         return None
 
+    def _save_result(self, result, history=True):
+        if self.db is not None:
+            self.db.save_result(result, history)
+
     def _trigger_alert(self, result):
         """
-        Simple alerting stub. In production, this would send an email/slack.
+        Hands a result to the alert dispatcher (non-blocking). The dispatcher
+        only notifies on state changes, grouped and rate limited per channel.
+        """
+        if self.alerts is not None:
+            self.alerts.submit(result)
+
+    def run_checks(self, services, on_result=None):
+        """
+        Runs health checks in PARALLEL, in dependency order.
+        Services whose upstream (`depends_on`) is DOWN are not probed but
+        reported as suppressed; once every `suppressed_probe_every` check
+        intervals they are probed anyway so recoveries are still noticed.
+        `on_result` (optional) is called with each result as soon as it completes.
+        """
+        results = []
+        for layer in build_layers(services):
+            to_probe = []
+            quiet = {} # Probed despite a DOWN upstream (name -> root cause): no alerts
+            for service in layer:
+                root = self._down_upstream(service)
+                if root is not None and not self._probe_while_suppressed(service):
+                    res = self._suppressed_result(service, root)
+                    self._record_status(res, root, probed=False)
+                    self._save_result(res, history=False) # Current state only; keeps uptime history honest
+                    results.append(res)
+                    if on_result:
+                        on_result(res)
+                else:
+                    if root is not None:
+                        quiet[service.get('name')] = root
+                    to_probe.append(service)
+
+            for res in self._run_batch(to_probe, on_result, quiet):
+                if res.get('sla_status') != 'UNKNOWN': # Not checked (worker failure): keep the last verdict
+                    self._record_status(res, None if res['status'] else quiet.get(res['name']))
+                    self._record_slo(res)
+                results.append(res)
+        return results
+
+    def _record_slo(self, result):
+        """
+        Feeds a result into the SLO counters and hands the service's
+        burn-rate rules to the alert dispatcher, which only notifies when a
+        rule starts or stops firing.
+        """
+        self.slo.record(result)
+        if self.alerts is None:
+            return
+        for rule in self.slo.evaluate(result['name'], result['timestamp']):
+            self.alerts.submit({
+                "name": f"{result['name']} [SLO {rule['rule']}]",
+                "type": "SLO",
+                "status": not rule['firing'],
+                "message": f"Burn rate {rule['long_burn_rate'] or 0:.1f}x over {rule['long_window']}, "
+                           f"{rule['short_burn_rate'] or 0:.1f}x over {rule['short_window']} "
+                           f"(threshold {rule['threshold']}x)",
+                "timestamp": result['timestamp']
+            })
+
+    def _down_upstream(self, service):
+        """
+        Returns the root-cause upstream name if any dependency is DOWN (or
+        itself suppressed), else None. Uses the latest known status.
+        """
+        for dep in get_dependencies(service):
+            status = self._last_status.get(dep)
+            if status is not None and not status[0]:
+                return status[1] or dep
+        return None
+
+    def _probe_while_suppressed(self, service):
+        """
+        True if a suppressed service is due for a real probe: its last one
+        was at least `suppressed_probe_every` check intervals ago (half an
+        interval of slack absorbs cycle jitter). Time based, so extra
+        run_checks calls do not speed it up.
+        """
+        every = service.get('suppressed_probe_every', self.suppressed_probe_every)
+        if not every:
+            return False
+        status = self._last_status.get(service.get('name'))
+        if status is None or status[2] is None:
+            return True # Never probed
+        return time.time() - status[2] >= (every - 0.5) * self.check_interval
+
+    def _record_status(self, result, suppressed_by=None, probed=True):
+        previous = self._last_status.get(result['name'])
+        probed_at = result['timestamp'] if probed else (previous[2] if previous else None)
+        self._last_status[result['name']] = (result['status'], suppressed_by, probed_at)
+
+    def _suppressed_result(self, service, root):
+        return {
+            "name": service.get('name', 'Unknown'),
+            "type": service.get('type', 'GENERIC').upper(),
+            "status": False,
+            "response_time": 0,
+            "message": f"Suppressed (upstream {root} down)",
+            "timestamp": time.time(),
+            "config": redact_config(service),
+            "sla_status": "SUPPRESSED",
+            "suppressed_by": root,
+            "ai_anomaly": False,
+            "ai_message": "Suppressed"
+        }
+
+    def _limited_check(self, service, alert, submitted_at):
         """
-        if not result['status']:
-            self.logger.critical(f"ALERT: Service {result['name']} is DOWN! Msg: {result['message']}")
+        Runs one check inside its host/type slot.
+        Returns (result, queue_wait, limit_wait).
+        """
+        started = time.monotonic()
+        with self.limiter.slot(service):
+            limit_wait = time.monotonic() - started
+            return self.check_service(service, alert), started - submitted_at, limit_wait
 
-    def run_checks(self, services):
+    def _run_batch(self, services, on_result=None, quiet=()):
         """
-        Runs health checks in PARALLEL.
+        Checks a batch of independent services in the thread pool.
+        Services named in `quiet` are checked without alerting.
         """
+        if self.process_runner is not None and len(services) > 1:
+            return self._run_batch_processes(services, on_result, quiet)
+
         results = []
+        if len(services) <= 1:
+            # Nothing to parallelise; skip spinning up a pool (one-shot probes)
+            for s in services:
+                res = self.check_service(s, s.get('name') not in quiet)
+                if res:
+                    results.append(res)
+                    if on_result:
+                        on_result(res)
+            return results
+
+        latencies, waits, limit_waits = [], [], []
+        workers = self.pool_sizer.workers_for(len(services))
         # Use ThreadPoolExecutor for I/O bound tasks
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_service = {executor.submit(self.check_service, s): s for s in services}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            future_to_service = {executor.submit(self._limited_check, s, s.get('name') not in quiet, time.monotonic()): s
+                                 for s in ConcurrencyLimiter.interleave_by_host(services)}
             
             for future in as_completed(future_to_service):
                 try:
-                    res = future.result()
+                    res, wait, limit_wait = future.result()
+                    waits.append(wait)
+                    limit_waits.append(limit_wait)
                     if res:
+                        if res['status']: # Failed probes report their timeout, not congestion
+                            latencies.append((get_host(future_to_service[future]), res['response_time']))
                         results.append(res)
+                        if on_result:
+                            on_result(res)
                 except Exception as exc:
                     self.logger.error(f"Service check generated an exception: {exc}")
-        
+
+        size = self.pool_sizer.observe(latencies, waits, workers, limit_waits)
+        if size != workers:
+            self.logger.debug(f"Adjusted check pool size: {workers} -> {size}")
+        return results
+
+    def _run_batch_processes(self, services, on_result=None, quiet=()):
+        """
+        Checks a batch on the worker processes, then persists and alerts here.
+        Results of a failed worker (sla_status UNKNOWN) only update the
+        current state: no history and no alert.
+        """
+        by_name = {s.get('name'): s for s in services}
+        results = []
+        for shard_results in self.process_runner.run(services):
+            for res in shard_results:
+                res['config'] = redact_config(by_name.get(res['name']))
+                unknown = res.get('sla_status') == 'UNKNOWN'
+                self._save_result(res, history=not unknown)
+                if not unknown and (res['status'] or res['name'] not in quiet):
+                    self._trigger_alert(res)
+                results.append(res)
+                if on_result:
+                    on_result(res)
         return results
+
+    def close(self):
+        """Stops worker processes (multi-process mode only) and flushes pending alerts."""
+        if self.process_runner is not None:
+            self.process_runner.close()
+        if self.alerts is not None:
+            self.alerts.close()
@@ -3,21 +3,43 @@ import sys
 import time
 from src.utils.logger import get_logger
 from src.utils.config_loader import ConfigLoader
-from src.engine import MonitorEngine
-from src.reporting.console_report import ConsoleReporter
-from src.reporting.json_report import JsonReporter
-from src.reporting.html_report import HtmlReporter
+
+# NOTE: Engine, reporters and the web server are imported inside main() on
+# purpose. They pull in Flask, Jinja2, requests and SQLite, which a one-shot
+# `--lean` run (cron jobs, Kubernetes probes) never needs.
 
 def main():
     logger = get_logger("Main")
-    
+
     # 1. Parse Arguments
     parser = argparse.ArgumentParser(description="Middleware Health & Integration Monitor")
     parser.add_argument('--config', default='config/services.yaml', help='Path to configuration file')
     parser.add_argument('--no-html', action='store_true', help='Disable HTML report generation')
+    parser.add_argument('--no-json', action='store_true', help='Disable JSON report generation')
+    parser.add_argument('--ndjson', metavar='PATH',
+                        help="Stream results as NDJSON while checks complete ('-' for stdout)")
+    parser.add_argument('--no-db', action='store_true', help='Do not record results in the history database')
+    parser.add_argument('--no-ai', action='store_true', help='Disable AI anomaly detection')
+    parser.add_argument('--service', action='append', metavar='NAME', help='Only check the named service (repeatable)')
+    parser.add_argument('--lean', action='store_true',
+                        help='Fast one-shot mode: implies --no-db --no-ai --no-json --no-html, '
+                             'exits with status 2 if any service is down')
+    parser.add_argument('--processes', type=int, default=None, metavar='N',
+                        help='Run checks in N worker processes (default: execution.processes from config, else threads only)')
+    parser.add_argument('--status', action='store_true',
+                        help='Print the last recorded status of every service from the database (no checks)')
     parser.add_argument('--web', action='store_true', help='Run in Web Server mode')
     args = parser.parse_args()
 
+    if args.status:
+        from src.db import Database
+        from src.reporting.console_report import ConsoleReporter
+        ConsoleReporter.generate_report(Database().get_latest_status())
+        return 0
+
+    if args.lean:
+        args.no_db = args.no_ai = args.no_json = args.no_html = True
+
     logger.info("Starting Middleware Health Monitor...")
 
     # 2. Load Configuration
@@ -26,7 +48,7 @@ def main():
         config = loader.load_config()
     except Exception as e:
         logger.critical(f"Failed to load configuration: {e}")
-        sys.exit(1)
+        return 1
 
     # 3. Web Mode
     if args.web:
@@ -35,28 +57,57 @@ def main():
             # though we put it in requirements, so standard import is fine.
             from src.web_server import run_server
             run_server(config)
-            return # Exit after server stops
+            return 0 # Exit after server stops
         except ImportError:
             logger.critical("Flask module not found. Please run 'pip install flask' to use --web mode.")
-            sys.exit(1)
+            return 1
+
+    services = config.get('services', [])
+    if args.service:
+        wanted = set(args.service)
+        services = [s for s in services if s['name'] in wanted]
+        missing = wanted - {s['name'] for s in services}
+        if missing:
+            logger.error(f"Unknown service(s): {', '.join(sorted(missing))}")
+            return 1
 
     # 4. CLI Mode - Execution
-    engine = MonitorEngine()
-    results = engine.run_checks(config.get('services', []))
+    from src.engine import MonitorEngine
+    processes = args.processes
+    if processes is None:
+        processes = (config.get('execution') or {}).get('processes', 0)
+    engine = MonitorEngine(use_db=not args.no_db, use_ai=not args.no_ai, limits=config.get('limits'),
+                           processes=processes, alerting=config.get('alerting'),
+                           slo=config.get('slo'))
+    try:
+        if args.ndjson:
+            from src.reporting.json_report import NdjsonStreamWriter
+            with NdjsonStreamWriter(args.ndjson) as stream:
+                results = engine.run_checks(services, on_result=stream.write)
+            if args.ndjson != '-':
+                logger.info(f"NDJSON results saved to: {args.ndjson}")
+        else:
+            results = engine.run_checks(services)
+    finally:
+        engine.close()
 
     # 5. Reporting
-    
+
     # Console
+    from src.reporting.console_report import ConsoleReporter
     ConsoleReporter.generate_report(results)
 
     # JSON
-    json_reporter = JsonReporter()
-    json_path = json_reporter.generate_report(results)
-    logger.info(f"JSON report saved to: {json_path}")
+    if not args.no_json:
+        from src.reporting.json_report import JsonReporter
+        json_reporter = JsonReporter()
+        json_path = json_reporter.generate_report(results)
+        logger.info(f"JSON report saved to: {json_path}")
 
     # HTML
     if not args.no_html:
         try:
+            from src.reporting.html_report import HtmlReporter
             html_reporter = HtmlReporter()
             html_path = html_reporter.generate_report(results)
             logger.info(f"HTML dashboard saved to: {html_path}")
@@ -65,5 +116,9 @@ def main():
 
     logger.info("Health check completed.")
 
+    if args.lean and not all(r['status'] for r in results):
+        return 2
+    return 0
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
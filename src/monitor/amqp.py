@@ -0,0 +1,422 @@
+"""
+Minimal AMQP 0-9-1 client for health checks.
+
+Only what a depth probe needs is implemented: the connection handshake
+(PLAIN auth), one channel, and passive Queue.Declare, which returns the
+message and consumer count of an existing queue without creating it.
+"""
+import socket
+import struct
+import threading
+import time
+
+PROTOCOL_HEADER = b'AMQP\x00\x00\x09\x01'
+FRAME_METHOD = 1
+FRAME_HEARTBEAT = 8
+FRAME_END = 0xCE
+
+# (class-id, method-id)
+CONNECTION_START = (10, 10)
+CONNECTION_START_OK = (10, 11)
+CONNECTION_TUNE = (10, 30)
+CONNECTION_TUNE_OK = (10, 31)
+CONNECTION_OPEN = (10, 40)
+CONNECTION_OPEN_OK = (10, 41)
+CONNECTION_CLOSE = (10, 50)
+CONNECTION_CLOSE_OK = (10, 51)
+CHANNEL_OPEN = (20, 10)
+CHANNEL_OPEN_OK = (20, 11)
+CHANNEL_CLOSE = (20, 40)
+CHANNEL_CLOSE_OK = (20, 41)
+QUEUE_DECLARE = (50, 10)
+QUEUE_DECLARE_OK = (50, 11)
+
+DECLARE_PASSIVE = 0x01
+REPLY_NOT_FOUND = 404
+
+
+class AmqpError(Exception):
+    """Connection-level failure; the connection is unusable afterwards."""
+
+
+class ChannelClosed(AmqpError):
+    """The broker closed the channel (e.g. 404 for a missing queue)."""
+
+    def __init__(self, code, text):
+        super().__init__(f"{code} {text}")
+        self.code = code
+        self.text = text
+        self.latency = None # Set by BrokerPool to the round trip of the answering poll
+
+
+def _shortstr(value):
+    data = value.encode('utf-8')
+    return struct.pack('>B', len(data)) + data
+
+
+def _longstr(value):
+    data = value if isinstance(value, bytes) else value.encode('utf-8')
+    return struct.pack('>I', len(data)) + data
+
+
+def _table(values):
+    body = b''.join(_shortstr(k) + b'S' + _longstr(v) for k, v in values.items())
+    return struct.pack('>I', len(body)) + body
+
+
+class _Reader:
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def octet(self):
+        self.pos += 1
+        return self.data[self.pos - 1]
+
+    def short(self):
+        self.pos += 2
+        return struct.unpack_from('>H', self.data, self.pos - 2)[0]
+
+    def long(self):
+        self.pos += 4
+        return struct.unpack_from('>I', self.data, self.pos - 4)[0]
+
+    def shortstr(self):
+        n = self.octet()
+        self.pos += n
+        return self.data[self.pos - n:self.pos].decode('utf-8', 'replace')
+
+    def longstr(self):
+        n = self.long()
+        self.pos += n
+        return self.data[self.pos - n:self.pos]
+
+    skip_table = longstr # Tables are length-prefixed; we never need their content
+
+
+class AmqpConnection:
+    """
+    A single AMQP connection with one channel used for passive declares.
+    Not thread-safe; BrokerPool serialises access per broker.
+    """
+
+    CHANNEL = 1
+
+    def __init__(self, host, port=5672, virtual_host='/', username='guest', password='guest', timeout=5):
+        self.host = host
+        self.port = port
+        self.virtual_host = virtual_host
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.sock = None
+        self.channel_open = False
+
+    # --- Framing ---
+
+    def _recv_exact(self, n):
+        buf = bytearray()
+        while len(buf) < n:
+            chunk = self.sock.recv(n - len(buf))
+            if not chunk:
+                raise AmqpError("Connection closed by broker")
+            buf.extend(chunk)
+        return bytes(buf)
+
+    def _frame(self, channel, method, args=b''):
+        payload = struct.pack('>HH', *method) + args
+        return struct.pack('>BHI', FRAME_METHOD, channel, len(payload)) + payload + bytes([FRAME_END])
+
+    def _send(self, channel, method, args=b''):
+        self.sock.sendall(self._frame(channel, method, args))
+
+    def _read_method(self):
+        """
+        Returns (channel, (class-id, method-id), reader) for the next method
+        frame, skipping heartbeats. Broker-initiated closes are acknowledged and
+        raised as exceptions.
+        """
+        while True:
+            frame_type, channel, size = struct.unpack('>BHI', self._recv_exact(7))
+            payload = self._recv_exact(size)
+            if self._recv_exact(1)[0] != FRAME_END:
+                raise AmqpError("Malformed frame from broker")
+            if frame_type == FRAME_HEARTBEAT:
+                continue
+            if frame_type != FRAME_METHOD:
+                raise AmqpError(f"Unexpected frame type {frame_type}")
+
+            reader = _Reader(payload)
+            method = (reader.short(), reader.short())
+            if method == CONNECTION_CLOSE:
+                code, text = reader.short(), reader.shortstr()
+                try:
+                    self._send(0, CONNECTION_CLOSE_OK)
+                finally:
+                    self._drop()
+                raise AmqpError(f"Broker closed connection: {code} {text}")
+            if method == CHANNEL_CLOSE:
+                code, text = reader.short(), reader.shortstr()
+                self._send(channel, CHANNEL_CLOSE_OK)
+                self.channel_open = False
+                raise ChannelClosed(code, text)
+            return channel, method, reader
+
+    def _expect(self, method):
+        _, got, reader = self._read_method()
+        if got != method:
+            raise AmqpError(f"Expected method {method}, got {got}")
+        return reader
+
+    # --- Lifecycle ---
+
+    @property
+    def is_open(self):
+        return self.sock is not None
+
+    def connect(self):
+        self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        try:
+            self.sock.sendall(PROTOCOL_HEADER)
+            reader = self._expect(CONNECTION_START)
+            reader.octet(), reader.octet()
+            reader.skip_table()
+            mechanisms = reader.longstr().decode('utf-8', 'replace').split()
+            if 'PLAIN' not in mechanisms:
+                raise AmqpError(f"Broker does not support PLAIN auth (offers: {', '.join(mechanisms)})")
+
+            credentials = b'\x00' + self.username.encode('utf-8') + b'\x00' + self.password.encode('utf-8')
+            self._send(0, CONNECTION_START_OK,
+                       _table({'product': 'middleware-monitor'}) + _shortstr('PLAIN') +
+                       _longstr(credentials) + _shortstr('en_US'))
+
+            reader = self._expect(CONNECTION_TUNE)
+            channel_max, frame_max = reader.short(), reader.long()
+            # Heartbeats disabled: the connection idles between polls and
+            # BrokerPool reconnects transparently if it was dropped.
+            self._send(0, CONNECTION_TUNE_OK, struct.pack('>HIH', channel_max, frame_max, 0))
+
+            self._send(0, CONNECTION_OPEN, _shortstr(self.virtual_host) + _shortstr('') + b'\x00')
+            self._expect(CONNECTION_OPEN_OK)
+            self._open_channel()
+        except Exception:
+            self._drop()
+            raise
+
+    def _open_channel(self):
+        self._send(self.CHANNEL, CHANNEL_OPEN, _shortstr(''))
+        self._expect(CHANNEL_OPEN_OK)
+        self.channel_open = True
+
+    def _drop(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+        self.channel_open = False
+
+    def close(self):
+        if self.sock is None:
+            return
+        try:
+            self._send(0, CONNECTION_CLOSE, struct.pack('>H', 200) + _shortstr('Goodbye') + struct.pack('>HH', 0, 0))
+            self._expect(CONNECTION_CLOSE_OK)
+        except (AmqpError, OSError):
+            pass
+        finally:
+            self._drop()
+
+    # --- Queue depth ---
+
+    def queue_depths(self, queues):
+        """
+        Polls many queues over this connection with pipelined passive declares.
+
+        Returns {queue: (message_count, consumer_count)} for existing queues and
+        {queue: ChannelClosed} for queues the broker rejected (e.g. 404).
+        Raises AmqpError/OSError on connection failures.
+        """
+        results = {}
+        pending = list(queues)
+        while pending:
+            if not self.channel_open:
+                self._open_channel()
+
+            # Send the whole batch in one write, then read replies in order
+            self.sock.sendall(b''.join(
+                self._frame(self.CHANNEL, QUEUE_DECLARE,
+                            struct.pack('>H', 0) + _shortstr(q) + bytes([DECLARE_PASSIVE]) + _table({}))
+                for q in pending))
+
+            while pending:
+                queue = pending[0]
+                try:
+                    reader = self._expect(QUEUE_DECLARE_OK)
+                except ChannelClosed as e:
+                    # The broker discards the rest of the batch after a channel
+                    # error; record it and resend the remainder on a new channel.
+                    results[queue] = e
+                    pending.pop(0)
+                    break
+                reader.shortstr()
+                results[queue] = (reader.long(), reader.long())
+                pending.pop(0)
+        return results
+
+
+class _Broker:
+    """
+    One persistent connection plus the set of queues monitored on a broker.
+    """
+
+    def __init__(self, params, batch_window, base_backoff, max_backoff, queue_idle, missing_retry):
+        self.params = params
+        self.batch_window = batch_window
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.queue_idle = queue_idle
+        self.missing_retry = missing_retry
+        self.lock = threading.Lock()
+        self.conn = None
+        self.queues = {} # Key: queue, Value: last time a check asked for it
+        self.missing = set() # Queues the broker rejected on their last poll
+        self.cache = {} # Key: queue, Value: (depth_or_error, poll_latency, polled_at)
+        self.failures = 0
+        self.next_attempt = 0
+        self.last_error = None
+
+    def _connect(self):
+        if self.conn is None or not self.conn.is_open:
+            self.conn = AmqpConnection(**self.params)
+            self.conn.connect()
+
+    def _fail(self, error):
+        if self.conn is not None:
+            self.conn._drop()
+        self.failures += 1
+        delay = min(self.max_backoff, self.base_backoff * (2 ** (self.failures - 1)))
+        self.next_attempt = time.time() + delay
+        self.last_error = error
+
+    def _prune(self, now):
+        """Forgets queues no check has asked for within `queue_idle` seconds."""
+        for q in [q for q, asked in self.queues.items() if now - asked > self.queue_idle]:
+            del self.queues[q]
+            self.cache.pop(q, None)
+            self.missing.discard(q)
+
+    def poll(self, queue):
+        with self.lock:
+            now = time.time()
+            self.queues[queue] = now
+            cached = self.cache.get(queue)
+            # A rejected queue is re-polled at most every `missing_retry` seconds
+            ttl = self.missing_retry if queue in self.missing else self.batch_window
+            if cached is not None and now - cached[2] < ttl:
+                return cached
+
+            if now < self.next_attempt:
+                raise AmqpError(f"{self.last_error} (reconnecting in {self.next_attempt - now:.1f}s)")
+
+            self._prune(now)
+            # Rejected queues stay out of other queues' batches: the broker
+            # closes the channel on them, which would cost every batch a
+            # channel re-open. The requested one goes last, so nothing after
+            # it has to be resent.
+            batch = sorted(q for q in self.queues if q not in self.missing)
+            if queue in self.missing:
+                batch.append(queue)
+
+            start = time.time()
+            try:
+                self._connect()
+                depths = self.conn.queue_depths(batch)
+            except (AmqpError, OSError) as e:
+                self._fail(e)
+                raise AmqpError(str(e)) from e
+
+            self.failures = 0
+            # Every queue in the batch reports the batch round trip: that is
+            # what a check of any one of them waited for.
+            elapsed = time.time() - start
+            for q, value in depths.items():
+                self.cache[q] = (value, elapsed, start)
+                if isinstance(value, ChannelClosed):
+                    self.missing.add(q)
+                else:
+                    self.missing.discard(q)
+            return self.cache[queue]
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+
+class BrokerPool:
+    """
+    Keeps one persistent AMQP connection per broker and batches depth polls:
+    the first check against a broker polls every queue registered on it, and
+    checks within `batch_window` seconds are answered from that poll.
+    Failed connects back off exponentially up to `max_backoff` seconds.
+    Queues not checked for `queue_idle` seconds leave the batch; queues the
+    broker rejects (404) are polled on their own, at most every
+    `missing_retry` seconds.
+    """
+
+    def __init__(self, batch_window=1.0, base_backoff=1.0, max_backoff=60.0,
+                 queue_idle=600.0, missing_retry=30.0):
+        self.batch_window = batch_window
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.queue_idle = queue_idle
+        self.missing_retry = missing_retry
+        self._brokers = {}
+        self._lock = threading.Lock()
+
+    def _broker(self, params):
+        key = tuple(sorted(params.items()))
+        broker = self._brokers.get(key)
+        if broker is None:
+            with self._lock:
+                broker = self._brokers.get(key)
+                if broker is None:
+                    broker = _Broker(params, self.batch_window, self.base_backoff, self.max_backoff,
+                                     self.queue_idle, self.missing_retry)
+                    self._brokers[key] = broker
+        return broker
+
+    def queue_depth(self, params, queue):
+        """
+        Returns (message_count, consumer_count, latency) for a queue, where
+        latency is the round trip of the batch poll that answered it.
+
+        Args:
+            params (dict): AmqpConnection keyword arguments identifying the broker.
+            queue (str): Queue name.
+
+        Raises:
+            ChannelClosed: The broker rejected the queue (404 if it does not
+                exist); its `latency` is that of the answering poll.
+            AmqpError: The broker is unreachable or the connection failed.
+        """
+        value, latency, _ = self._broker(params).poll(queue)
+        if isinstance(value, ChannelClosed):
+            error = ChannelClosed(value.code, value.text)
+            error.latency = latency
+            raise error
+        return value[0], value[1], latency
+
+    def close(self):
+        with self._lock:
+            brokers = list(self._brokers.values())
+            self._brokers.clear()
+        for broker in brokers:
+            broker.close()
+
+
+# Process-wide pool shared by all MQ monitors
+broker_pool = BrokerPool()
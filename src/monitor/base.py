@@ -2,6 +2,28 @@ from abc import ABC, abstractmethod
 import time
 from src.utils.logger import get_logger
 
+# Config keys whose values never leave the monitor (matched as substrings,
+# case-insensitively): results are written to latest_health.json, the NDJSON
+# stream and the HTML report.
+SECRET_KEYS = ('password', 'passwd', 'secret', 'token', 'api_key', 'apikey',
+               'credential', 'authorization', 'username')
+REDACTED = '***'
+
+
+def redact_config(config):
+    """
+    Returns a copy of a service config with secret values masked, for
+    attaching to results. Nested mappings and lists are redacted too.
+    """
+    if isinstance(config, dict):
+        return {key: REDACTED if any(s in str(key).lower() for s in SECRET_KEYS) and value is not None
+                else redact_config(value)
+                for key, value in config.items()}
+    if isinstance(config, list):
+        return [redact_config(item) for item in config]
+    return config
+
+
 class BaseMonitor(ABC):
     """
     Abstract Base Class for all service monitors.
@@ -13,6 +35,17 @@ class BaseMonitor(ABC):
         self.name = service_config.get('name', 'Unknown Service')
         self.service_type = service_config.get('type', 'GENERIC')
         self.logger = get_logger(f"Monitor-{self.name}")
+        self.sla_threshold = float(service_config.get('sla_threshold', 1.0))
+        self._public_config = redact_config(service_config) # Attached to every result
+        self._parse_config()
+
+    def _parse_config(self):
+        """
+        Hook to validate and pre-parse the service config once, at construction.
+        Monitors are cached per service, so anything done here stays off the
+        per-check path. Raise ValueError for invalid configurations.
+        """
+        pass
 
     @abstractmethod
     def check_health(self):
@@ -39,5 +72,5 @@ class BaseMonitor(ABC):
             "response_time": round(response_time, 4),
             "message": message,
             "timestamp": time.time(),
-            "config": self.service_config # Include config for reporting context
+            "config": self._public_config # Include config (secrets masked) for reporting context
         }
@@ -1,50 +1,91 @@
 import time
 import random
 from .base import BaseMonitor
+from .amqp import broker_pool, AmqpError, ChannelClosed, REPLY_NOT_FOUND
 
 class MqMonitor(BaseMonitor):
     """
     Monitor for Message Queues (IBM MQ / RabbitMQ style).
+    Real checks speak AMQP 0-9-1 over a pooled, persistent connection per broker.
     Supports Simulation Mode.
     """
 
+    DEFAULT_MAX_DEPTH = 1000
+
+    def _parse_config(self):
+        self.simulation_mode = self.service_config.get('simulation_mode', False)
+        self.protocol = str(self.service_config.get('protocol', 'amqp')).lower()
+        self.host = self.service_config.get('host', 'localhost')
+        self.port = int(self.service_config.get('port', 5672 if self.protocol == 'amqp' else 1414))
+        self.queue = self.service_config.get('queue_name', 'UNKNOWN.Q')
+        # Depth at or above which the queue counts as unhealthy (per queue)
+        self.max_depth = int(self.service_config.get('max_depth', self.DEFAULT_MAX_DEPTH))
+        self.broker_params = {
+            "host": self.host,
+            "port": self.port,
+            "virtual_host": self.service_config.get('virtual_host', '/'),
+            "username": self.service_config.get('username', 'guest'),
+            "password": self.service_config.get('password', 'guest'),
+            "timeout": float(self.service_config.get('connection_timeout', 5))
+        }
+
     def check_health(self):
-        simulation_mode = self.service_config.get('simulation_mode', False)
-        
-        if simulation_mode:
+        if self.simulation_mode:
             return self._run_simulation()
+        elif self.protocol == 'amqp':
+            return self._run_real_check()
         else:
-            return self._generate_result(False, 0, "Real MQ check not implemented in this demo (Requires pymqi/pika)")
+            return self._generate_result(False, 0, f"Real MQ check not implemented for protocol '{self.protocol}' (supported: amqp)")
+
+    def _run_real_check(self):
+        """
+        Reads the queue depth with a passive declare. Queues on the same broker
+        share one connection and are polled together (see BrokerPool).
+        """
+        start_time = time.time()
+        try:
+            depth, consumers, latency = broker_pool.queue_depth(self.broker_params, self.queue)
+        except ChannelClosed as e:
+            elapsed = e.latency if e.latency is not None else time.time() - start_time
+            if e.code == REPLY_NOT_FOUND:
+                return self._generate_result(False, elapsed, f"Queue '{self.queue}' not found")
+            return self._generate_result(False, elapsed, f"Broker rejected queue check: {e}")
+        except (AmqpError, OSError) as e:
+            elapsed = time.time() - start_time
+            self.logger.error(f"Error connecting to MQ broker {self.host}:{self.port}: {e}")
+            return self._generate_result(False, elapsed, f"Connection Error: {str(e)}")
+
+        return self._grade_depth(depth, latency, f", Consumers: {consumers}")
+
+    def _grade_depth(self, current_depth, elapsed, extra=""):
+        if current_depth < self.max_depth:
+            msg = f"OK (Connected, Depth: {current_depth}{extra})"
+            return self._generate_result(True, elapsed, msg)
+        else:
+            msg = f"Warning (Depth High: {current_depth} >= {self.max_depth}{extra})"
+            # In some systems high depth is failure, others warning. We mark it as unhealthy.
+            return self._generate_result(False, elapsed, msg)
 
     def _run_simulation(self):
         """
         Simulates MQ connectivity and Queue Depth check.
         """
         start_time = time.time()
-        host = self.service_config.get('host', 'localhost')
-        port = self.service_config.get('port', 1414)
-        queue = self.service_config.get('queue_name', 'UNKNOWN.Q')
-        
+        host = self.host
+        port = self.port
+        queue = self.queue
+
         self.logger.info(f"Simulating MQ check for {host}:{port} ({queue})")
-        
+
         # Simulate latency
         time.sleep(0.05)
         elapsed = time.time() - start_time
-        
+
         # Simulate dynamic queue depth
         # Most of the time it's healthy, sometimes it's "backed up"
         # For determinism in this demo, we'll keep it healthy unless specific config triggers failure
         # (or just random for 'aliveness')
-        
+
         current_depth = random.randint(0, 50)
-        
-        # Arbitrary threshold for health in this simulation
-        threshold = 1000 
-        
-        if current_depth < threshold:
-            msg = f"OK (Connected, Depth: {current_depth})"
-            return self._generate_result(True, elapsed, msg)
-        else:
-            msg = f"Warning (Depth High: {current_depth})"
-            # In some systems high depth is failure, others warning. We'll mark as Unhealthy for demo if extremely high
-            return self._generate_result(False, elapsed, msg)
+
+        return self._grade_depth(current_depth, elapsed)
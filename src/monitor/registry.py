@@ -0,0 +1,126 @@
+import threading
+from importlib import import_module
+from src.utils.logger import get_logger
+
+# Entry point group third-party packages use to ship extra probe types, e.g.:
+#   [project.entry-points."middleware_monitor.monitors"]
+#   LDAP = "acme_probes.ldap:LdapMonitor"
+ENTRY_POINT_GROUP = 'middleware_monitor.monitors'
+
+# Built-in monitors are referenced by import path so their modules (and heavy
+# dependencies such as `requests`) are only imported when a service uses them.
+BUILTIN_MONITORS = {
+    'REST': 'src.monitor.rest_monitor:RestMonitor',
+    'SOAP': 'src.monitor.soap_monitor:SoapMonitor',
+    'MQ': 'src.monitor.mq_monitor:MqMonitor',
+}
+
+
+def _load_target(target):
+    """
+    Resolves a 'module:Class' string (or an entry point) to the monitor class.
+    """
+    if hasattr(target, 'load'):
+        return target.load()
+    if isinstance(target, str):
+        module_name, _, attr = target.partition(':')
+        return getattr(import_module(module_name), attr)
+    return target
+
+
+def _iter_entry_points(group):
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return []
+
+    eps = entry_points()
+    if hasattr(eps, 'select'):
+        return list(eps.select(group=group))
+    return list(eps.get(group, []))  # Python 3.9
+
+
+class MonitorRegistry:
+    """
+    Maps service types (REST, SOAP, MQ, ...) to monitor classes.
+    Classes are imported lazily on first use and then kept for the process lifetime.
+    """
+
+    def __init__(self, builtins=None, entry_point_group=ENTRY_POINT_GROUP):
+        self.logger = get_logger("MonitorRegistry")
+        self._targets = dict(BUILTIN_MONITORS if builtins is None else builtins)
+        self._classes = {}
+        self._entry_point_group = entry_point_group
+        self._entry_points_loaded = False
+        self._lock = threading.Lock()
+
+    def register(self, s_type, target):
+        """
+        Registers a monitor for a service type.
+
+        Args:
+            s_type (str): Service type as used in the config (case-insensitive).
+            target: A BaseMonitor subclass or a 'module:Class' import path.
+        """
+        s_type = s_type.upper()
+        with self._lock:
+            self._targets[s_type] = target
+            self._classes.pop(s_type, None)
+
+    def types(self):
+        """Returns all known service types without importing any monitor."""
+        self._discover_entry_points()
+        return sorted(self._targets)
+
+    def get(self, s_type):
+        """
+        Returns the monitor class for a service type, or None if unknown.
+        """
+        s_type = (s_type or '').upper()
+        cls = self._classes.get(s_type)
+        if cls is not None:
+            return cls
+
+        self._discover_entry_points()
+        with self._lock:
+            cls = self._classes.get(s_type)
+            if cls is None:
+                target = self._targets.get(s_type)
+                if target is None:
+                    return None
+                cls = _load_target(target)
+                self._classes[s_type] = cls
+        return cls
+
+    def create(self, service):
+        """
+        Instantiates (and thereby validates) the monitor for a service config.
+        Returns None if the service type is unknown.
+        """
+        cls = self.get(service.get('type'))
+        if cls is None:
+            return None
+        return cls(service)
+
+    def _discover_entry_points(self):
+        if self._entry_points_loaded:
+            return
+        with self._lock:
+            if self._entry_points_loaded:
+                return
+            try:
+                for ep in _iter_entry_points(self._entry_point_group):
+                    # Explicit register() calls and built-ins take precedence.
+                    self._targets.setdefault(ep.name.upper(), ep)
+            except Exception as e:
+                self.logger.error(f"Failed to discover monitor plugins: {e}")
+            self._entry_points_loaded = True
+
+
+# Process-wide default registry
+registry = MonitorRegistry()
+
+
+def register_monitor(s_type, target):
+    """Convenience wrapper to register a monitor on the default registry."""
+    registry.register(s_type, target)
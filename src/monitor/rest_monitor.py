@@ -8,11 +8,19 @@ class RestMonitor(BaseMonitor):
     Checks HTTP status codes and response latency.
     """
 
+    def _parse_config(self):
+        self.url = self.service_config.get('url')
+        if not self.url:
+            raise ValueError(f"REST service '{self.name}' requires a 'url'.")
+        self.timeout = float(self.service_config.get('timeout', 5))
+        self.expected_status = int(self.service_config.get('expected_status', 200))
+        self.verify_ssl = self.service_config.get('verify_ssl', True)
+
     def check_health(self):
-        url = self.service_config.get('url')
-        timeout = self.service_config.get('timeout', 5)
-        expected_status = self.service_config.get('expected_status', 200)
-        verify_ssl = self.service_config.get('verify_ssl', True)
+        url = self.url
+        timeout = self.timeout
+        expected_status = self.expected_status
+        verify_ssl = self.verify_ssl
 
         start_time = time.time()
         try:
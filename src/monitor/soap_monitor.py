@@ -1,19 +1,110 @@
 import time
+from xml.etree.ElementTree import XMLPullParser
+from xml.sax.saxutils import escape, quoteattr
 import requests
 from .base import BaseMonitor
+from .wsdl import wsdl_cache, split_tag, CHUNK_SIZE
+
+SOAP11_ENV_NS = 'http://schemas.xmlsoap.org/soap/envelope/'
+SOAP12_ENV_NS = 'http://www.w3.org/2003/05/soap-envelope'
+
+
+def _parse_path(path):
+    """
+    Parses the XPath subset used by assertions into (anchored, [local names]).
+    Supported: '/Envelope/Body/EchoResponse/EchoResult' (absolute),
+    '//EchoResult' or 'EchoResponse/EchoResult' (matched at any depth).
+    Namespace prefixes are ignored.
+    """
+    anchored = path.startswith('/') and not path.startswith('//')
+    steps = [step.split(':')[-1] for step in path.strip('/').split('/') if step]
+    if not steps or any(step in ('', '.', '..', '*') or '[' in step for step in steps):
+        raise ValueError(f"Unsupported assertion path '{path}'")
+    return anchored, steps
+
+
+class _Assertion:
+    def __init__(self, spec):
+        if isinstance(spec, str):
+            spec = {"path": spec}
+        self.path = spec['path']
+        self.anchored, self.steps = _parse_path(self.path)
+        self.equals = spec.get('equals')
+        self.contains = spec.get('contains')
+        self.passed = False
+        self.seen = None
+
+    def matches(self, path):
+        if self.anchored:
+            return path == self.steps
+        return path[-len(self.steps):] == self.steps
+
+    def check(self, text):
+        text = (text or '').strip()
+        self.seen = text
+        if self.equals is not None:
+            return text == str(self.equals)
+        if self.contains is not None:
+            return str(self.contains) in text
+        return True
+
+    def describe_failure(self):
+        if self.seen is None:
+            return f"'{self.path}' not found"
+        expected = f"== '{self.equals}'" if self.equals is not None else f"contains '{self.contains}'"
+        return f"'{self.path}' {expected} (got '{self.seen[:80]}')"
+
 
 class SoapMonitor(BaseMonitor):
     """
     Monitor for SOAP services.
     Supports Simulation Mode for demo purposes.
-    Reference: For production, integrate with 'zeep' library.
+
+    With an `operation` configured, real checks POST a prebuilt envelope to
+    that (ping/echo) operation and validate the response with a streaming
+    parser: SOAP faults fail the check and `assertions` are evaluated against
+    the response elements, all within `max_response_bytes`. Without one, the
+    check only verifies that the WSDL (or endpoint) is reachable.
     """
 
+    def _parse_config(self):
+        self.simulation_mode = self.service_config.get('simulation_mode', False)
+        self.url = self.service_config.get('url')
+        self.wsdl = self.service_config.get('wsdl')
+        self.target = self.wsdl if self.wsdl else self.url
+        if not self.simulation_mode and not self.target:
+            raise ValueError(f"SOAP service '{self.name}' requires a 'wsdl' or 'url'.")
+        self.timeout = float(self.service_config.get('timeout', 10))
+        self.verify_ssl = self.service_config.get('verify_ssl', True)
+        self.wsdl_max_age = self.service_config.get('wsdl_revalidate')
+
+        self.operation = self.service_config.get('operation')
+        self.namespace = self.service_config.get('namespace')
+        self.soap_action = self.service_config.get('soap_action')
+        self.soap_version = str(self.service_config.get('soap_version', '1.1'))
+        if self.soap_version not in ('1.1', '1.2'):
+            raise ValueError(f"SOAP service '{self.name}': soap_version must be '1.1' or '1.2'.")
+        self.max_response_bytes = int(self.service_config.get('max_response_bytes', 1024 * 1024))
+        self.assertion_specs = self.service_config.get('assertions') or []
+        for spec in self.assertion_specs:
+            _Assertion(spec) # Validate paths once, up front
+
+        if self.operation and not self.namespace and not self.wsdl:
+            raise ValueError(f"SOAP service '{self.name}': 'operation' needs a 'namespace' or a 'wsdl' to derive it from.")
+
+        self.session = requests.Session() # Keep-alive across checks (monitors are cached)
+        self._envelope = None
+        self._endpoint = None
+        self._headers = None
+        self._wsdl_info = None
+        if self.operation and self.namespace and (self.url or not self.wsdl):
+            self._build_request(None)
+
     def check_health(self):
-        simulation_mode = self.service_config.get('simulation_mode', False)
-        
-        if simulation_mode:
+        if self.simulation_mode:
             return self._run_simulation()
+        elif self.operation:
+            return self._run_operation_check()
         else:
             return self._run_real_check()
 
@@ -23,37 +114,178 @@ class SoapMonitor(BaseMonitor):
         """
         start_time = time.time()
         # Simulate network latency
-        time.sleep(0.12) 
+        time.sleep(0.12)
         elapsed = time.time() - start_time
-        
+
         self.logger.info(f"Simulating SOAP check for {self.name}")
-        
+
         # Simulate success
         return self._generate_result(True, elapsed, "OK (Simulated WSDL Access)")
 
     def _run_real_check(self):
         """
         Performs a basic reachability check on the WSDL or Endpoint.
-        In a full enterprise version, this would use the `zeep` client
-        to actually call a 'ping' or 'echo' method.
+        The WSDL is always requested, but conditionally (If-None-Match /
+        If-Modified-Since): a 304 proves the server is alive without
+        downloading and parsing the document again.
         """
-        url = self.service_config.get('url')
-        wsdl = self.service_config.get('wsdl')
-        target = wsdl if wsdl else url
-        timeout = self.service_config.get('timeout', 10)
+        target = self.target
+        timeout = self.timeout
 
         start_time = time.time()
         try:
             self.logger.debug(f"Checking SOAP endpoint availability: {target}")
-            # Simple GET on WSDL is often enough to prove the service is 'up' HTTP-wise
-            response = requests.get(target, timeout=timeout)
+            if self.wsdl:
+                # max_age=0: a health probe must reach the server every cycle
+                _, status = wsdl_cache.get(self.wsdl, timeout, self.verify_ssl, self.session, max_age=0)
+                elapsed = time.time() - start_time
+                detail = {304: "Not Modified: 304", 200: "Reachable: 200"}[status]
+                return self._generate_result(True, elapsed, f"OK (WSDL {detail})")
+
+            # Simple GET on the endpoint is often enough to prove the service is 'up' HTTP-wise
+            response = self.session.get(target, timeout=timeout, verify=self.verify_ssl)
             elapsed = time.time() - start_time
 
             if response.status_code == 200:
-                 return self._generate_result(True, elapsed, f"OK (WSDL Reachable: {response.status_code})")
+                 return self._generate_result(True, elapsed, f"OK (Endpoint Reachable: {response.status_code})")
             else:
                  return self._generate_result(False, elapsed, f"Failed. Status: {response.status_code}")
 
+        except ValueError as e:
+            elapsed = time.time() - start_time
+            return self._generate_result(False, elapsed, f"Failed. {str(e)}")
         except requests.exceptions.RequestException as e:
             elapsed = time.time() - start_time
             return self._generate_result(False, elapsed, f"Connection Error: {str(e)}")
+
+    # --- Operation checks ---
+
+    def _build_request(self, info):
+        """
+        Builds the envelope, endpoint and headers once. Called again only when
+        a revalidated WSDL produced a new parse.
+        """
+        namespace = self.namespace or (info.target_namespace if info else None)
+        if not namespace:
+            raise ValueError("WSDL has no targetNamespace; set 'namespace'")
+        endpoint = self.url or (info.endpoints[0] if info and info.endpoints else None)
+        if not endpoint:
+            raise ValueError("WSDL has no soap:address; set 'url'")
+        action = self.soap_action
+        if action is None:
+            action = info.soap_actions.get(self.operation, '') if info else ''
+
+        body = self.service_config.get('body')
+        if body is None:
+            params = self.service_config.get('parameters') or {}
+            body = ''.join(f"<tns:{k}>{escape(str(v))}</tns:{k}>" for k, v in params.items())
+            body = f"<tns:{self.operation} xmlns:tns={quoteattr(namespace)}>{body}</tns:{self.operation}>"
+
+        env_ns = SOAP11_ENV_NS if self.soap_version == '1.1' else SOAP12_ENV_NS
+        self._envelope = (
+            '<?xml version="1.0" encoding="utf-8"?>'
+            f'<soap:Envelope xmlns:soap="{env_ns}"><soap:Body>{body}</soap:Body></soap:Envelope>'
+        ).encode('utf-8')
+
+        if self.soap_version == '1.1':
+            self._headers = {"Content-Type": "text/xml; charset=utf-8", "SOAPAction": f'"{action}"'}
+        else:
+            content_type = "application/soap+xml; charset=utf-8"
+            if action:
+                content_type += f'; action="{action}"'
+            self._headers = {"Content-Type": content_type}
+        self._endpoint = endpoint
+        self._wsdl_info = info
+
+    def _run_operation_check(self):
+        start_time = time.time()
+        try:
+            if self.wsdl and not (self.namespace and self.url and self.soap_action is not None):
+                info, _ = wsdl_cache.get(self.wsdl, self.timeout, self.verify_ssl, self.session, self.wsdl_max_age)
+                if info is not self._wsdl_info:
+                    self._build_request(info)
+            elif self._envelope is None:
+                self._build_request(None)
+
+            response = self.session.post(self._endpoint, data=self._envelope, headers=self._headers,
+                                         timeout=self.timeout, verify=self.verify_ssl, stream=True)
+            try:
+                ok, detail = self._validate_response(response)
+            finally:
+                response.close()
+            elapsed = time.time() - start_time
+        except ValueError as e:
+            elapsed = time.time() - start_time
+            return self._generate_result(False, elapsed, f"Failed. {str(e)}")
+        except requests.exceptions.RequestException as e:
+            elapsed = time.time() - start_time
+            self.logger.error(f"Error calling SOAP operation {self.operation} on {self._endpoint}: {e}")
+            return self._generate_result(False, elapsed, f"Connection Error: {str(e)}")
+
+        if ok:
+            return self._generate_result(True, elapsed, f"OK ({self.operation}: {detail})")
+        return self._generate_result(False, elapsed, f"Failed. {self.operation}: {detail}")
+
+    def _validate_response(self, response):
+        """
+        Streams the response through a pull parser, discarding finished
+        elements, and returns (ok, detail).
+        """
+        assertions = [_Assertion(spec) for spec in self.assertion_specs]
+        parser = XMLPullParser(events=('start', 'end'))
+        path = []
+        elems = []
+        fault = None
+        fault_depth = None
+        received = 0
+        saw_envelope = False
+
+        def handle_events():
+            nonlocal fault, fault_depth, saw_envelope
+            for event, elem in parser.read_events():
+                ns, local = split_tag(elem.tag)
+                if event == 'start':
+                    path.append(local)
+                    elems.append(elem)
+                    if local == 'Envelope' and ns in (SOAP11_ENV_NS, SOAP12_ENV_NS):
+                        saw_envelope = True
+                    if local == 'Fault' and ns in (SOAP11_ENV_NS, SOAP12_ENV_NS) and fault_depth is None:
+                        fault_depth = len(path)
+                        fault = "SOAP Fault"
+                    continue
+
+                if fault_depth is not None and local in ('faultstring', 'Text') and elem.text:
+                    fault = f"SOAP Fault: {elem.text.strip()[:200]}"
+                for assertion in assertions:
+                    if not assertion.passed and assertion.matches(path):
+                        assertion.passed = assertion.check(elem.text)
+
+                path.pop()
+                elems.pop()
+                if elems:
+                    elems[-1].remove(elem) # Keep memory bounded
+
+        try:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                received += len(chunk)
+                if received > self.max_response_bytes:
+                    return False, f"Response exceeds {self.max_response_bytes} bytes"
+                parser.feed(chunk)
+                handle_events()
+            parser.close()
+            handle_events()
+        except Exception as e:
+            if fault:
+                return False, fault
+            return False, f"Invalid XML response (HTTP {response.status_code}): {e}"
+
+        if fault:
+            return False, fault
+        if response.status_code != 200:
+            return False, f"HTTP {response.status_code}"
+        if not saw_envelope:
+            return False, "Response is not a SOAP envelope"
+        failed = [a.describe_failure() for a in assertions if not a.passed]
+        if failed:
+            return False, "Assertion failed: " + "; ".join(failed)
+        return True, f"Status {response.status_code}" + (f", {len(assertions)} assertion(s) passed" if assertions else "")
@@ -0,0 +1,154 @@
+"""
+WSDL fetching, parsing and caching for SOAP checks.
+
+Parsed WSDLs are kept per URL together with their ETag / Last-Modified
+validators. After `revalidate_after` seconds the next check sends a
+conditional GET, so an unchanged WSDL costs a 304 instead of a full
+download and re-parse.
+"""
+import threading
+import time
+from xml.etree.ElementTree import XMLPullParser
+import requests
+
+WSDL_NS = 'http://schemas.xmlsoap.org/wsdl/'
+SOAP11_BINDING_NS = 'http://schemas.xmlsoap.org/wsdl/soap/'
+SOAP12_BINDING_NS = 'http://schemas.xmlsoap.org/wsdl/soap12/'
+
+CHUNK_SIZE = 16 * 1024
+
+
+def split_tag(tag):
+    """Splits '{namespace}local' into (namespace, local)."""
+    if tag[0] == '{':
+        ns, _, local = tag[1:].partition('}')
+        return ns, local
+    return '', tag
+
+
+class WsdlInfo:
+    """
+    The parts of a WSDL a health check needs.
+    """
+
+    def __init__(self):
+        self.target_namespace = None
+        self.endpoints = []     # soap:address locations
+        self.soap_actions = {}  # Key: operation name, Value: soapAction
+        self.operations = set()
+
+    def __repr__(self):
+        return f"WsdlInfo(ns={self.target_namespace!r}, operations={sorted(self.operations)})"
+
+
+def parse_wsdl(chunks):
+    """
+    Parses a WSDL from an iterable of byte chunks without building the full tree.
+    """
+    info = WsdlInfo()
+    parser = XMLPullParser(events=('start', 'end'))
+    stack = []
+    current_op = None
+
+    def handle_events():
+        nonlocal current_op
+        for event, elem in parser.read_events():
+            if event == 'start':
+                ns, local = split_tag(elem.tag)
+                if ns == WSDL_NS:
+                    if local == 'definitions':
+                        info.target_namespace = elem.get('targetNamespace')
+                    elif local == 'operation':
+                        current_op = elem.get('name')
+                        info.operations.add(current_op)
+                elif ns in (SOAP11_BINDING_NS, SOAP12_BINDING_NS):
+                    if local == 'operation' and current_op and elem.get('soapAction') is not None:
+                        info.soap_actions.setdefault(current_op, elem.get('soapAction'))
+                    elif local == 'address' and elem.get('location'):
+                        info.endpoints.append(elem.get('location'))
+                stack.append(elem)
+            else:
+                stack.pop()
+                # Drop finished subtrees to keep memory bounded
+                if stack:
+                    stack[-1].remove(elem)
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        handle_events()
+    parser.close()
+    handle_events()
+    return info
+
+
+class WsdlCache:
+    """
+    Thread-safe cache of parsed WSDLs with HTTP revalidation.
+    """
+
+    def __init__(self, revalidate_after=300):
+        self.revalidate_after = revalidate_after
+        self._entries = {} # Key: url, Value: dict(info, etag, last_modified, checked_at)
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _url_lock(self, url):
+        with self._lock:
+            return self._locks.setdefault(url, threading.Lock())
+
+    def get(self, url, timeout=10, verify=True, session=None, max_age=None):
+        """
+        Returns (WsdlInfo, http_status). http_status is None when the cached
+        copy was used without contacting the server, 304 when it was
+        revalidated, and 200 when it was (re)downloaded.
+
+        Raises requests.RequestException on network errors and ValueError if
+        the server returns an error status or an unparseable document.
+        """
+        max_age = self.revalidate_after if max_age is None else max_age
+        entry = self._entries.get(url)
+        if entry is not None and time.time() - entry['checked_at'] < max_age:
+            return entry['info'], None
+
+        # One fetch per URL at a time; concurrent checks reuse its outcome.
+        with self._url_lock(url):
+            entry = self._entries.get(url)
+            if entry is not None and time.time() - entry['checked_at'] < max_age:
+                return entry['info'], None
+
+            headers = {}
+            if entry is not None:
+                if entry['etag']:
+                    headers['If-None-Match'] = entry['etag']
+                if entry['last_modified']:
+                    headers['If-Modified-Since'] = entry['last_modified']
+
+            http = session or requests
+            response = http.get(url, headers=headers, timeout=timeout, verify=verify, stream=True)
+            try:
+                if response.status_code == 304 and entry is not None:
+                    entry['checked_at'] = time.time()
+                    return entry['info'], 304
+                if response.status_code != 200:
+                    raise ValueError(f"WSDL fetch failed. Status: {response.status_code}")
+                try:
+                    info = parse_wsdl(response.iter_content(CHUNK_SIZE))
+                except Exception as e:
+                    raise ValueError(f"Invalid WSDL: {e}")
+            finally:
+                response.close()
+
+            self._entries[url] = {
+                "info": info,
+                "etag": response.headers.get('ETag'),
+                "last_modified": response.headers.get('Last-Modified'),
+                "checked_at": time.time()
+            }
+            return info, 200
+
+    def invalidate(self, url):
+        self._entries.pop(url, None)
+
+
+# Process-wide cache shared by all SOAP monitors
+wsdl_cache = WsdlCache()
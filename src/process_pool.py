@@ -0,0 +1,187 @@
+import marshal
+import multiprocessing
+import pickle
+import threading
+import time
+import zlib
+from multiprocessing.connection import wait
+from src.utils.logger import get_logger
+
+# Result fields shipped back from workers, in tuple order. The service config
+# is never sent back; the parent re-attaches its own copy.
+RESULT_FIELDS = ('name', 'type', 'status', 'response_time', 'message', 'timestamp',
+                 'sla_status', 'ai_anomaly', 'ai_score', 'ai_message')
+
+_MARSHAL = b'M'
+_PICKLE = b'P'
+
+
+def _pack(results):
+    """
+    Encodes results as compact tuples. marshal is used when every value is a
+    plain builtin (the normal case); pickle otherwise.
+    """
+    rows = []
+    for r in results:
+        extra = {k: v for k, v in r.items() if k not in RESULT_FIELDS and k != 'config'}
+        rows.append(tuple(r.get(k) for k in RESULT_FIELDS) + (extra or None,))
+    try:
+        return _MARSHAL + marshal.dumps(rows)
+    except ValueError:
+        return _PICKLE + pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _unpack(data):
+    rows = marshal.loads(data[1:]) if data[:1] == _MARSHAL else pickle.loads(data[1:])
+    results = []
+    for row in rows:
+        result = dict(zip(RESULT_FIELDS, row))
+        if row[-1]:
+            result.update(row[-1])
+        results.append(result)
+    return results
+
+
+def _worker_main(conn, engine_kwargs):
+    """
+    Worker process loop: receives batches of services, checks them with a
+    process-local MonitorEngine (own monitor cache, connection pools and AI
+    history) and sends back packed results. Persistence and alerting stay in
+    the parent.
+    """
+    from src.engine import MonitorEngine
+    engine = MonitorEngine(use_db=False, alerting=False, **engine_kwargs)
+    while True:
+        try:
+            services = conn.recv()
+        except EOFError:
+            break
+        if services is None:
+            break
+        quiet = {s.get('name') for s in services}
+        results = engine._run_batch(services, quiet=quiet)
+        conn.send_bytes(_pack(results))
+    conn.close()
+
+
+class ShardedProcessRunner:
+    """
+    Runs checks across worker processes so CPU-heavy validation (TLS, XML
+    parsing, assertions, anomaly scoring) scales with cores.
+
+    Services are sharded by a stable hash of their name, so a service always
+    lands on the same worker and its cached monitor, pooled connections and
+    anomaly history stay warm. Workers are started lazily and restarted if
+    they die; a worker still busy `batch_timeout` seconds into a batch is
+    killed and restarted on the next one.
+
+    Services of a shard whose worker failed are reported with sla_status
+    UNKNOWN: they were not checked, so they carry no UP/DOWN verdict.
+    """
+
+    def __init__(self, processes, engine_kwargs=None, batch_timeout=300.0):
+        self.logger = get_logger("ProcessPool")
+        self.processes = processes
+        self.engine_kwargs = engine_kwargs or {}
+        self.batch_timeout = batch_timeout
+        self._ctx = multiprocessing.get_context('spawn') # Safe with the parent's threads
+        self._workers = [None] * processes # (Process, Connection)
+        self._lock = threading.Lock() # One batch at a time per worker pipe
+
+    def _shard(self, name):
+        return zlib.crc32(name.encode('utf-8')) % self.processes
+
+    def _worker(self, idx):
+        worker = self._workers[idx]
+        if worker is None or not worker[0].is_alive():
+            parent_conn, child_conn = self._ctx.Pipe()
+            proc = self._ctx.Process(target=_worker_main, args=(child_conn, self.engine_kwargs),
+                                     name=f"monitor-worker-{idx}", daemon=True)
+            proc.start()
+            child_conn.close()
+            worker = (proc, parent_conn)
+            self._workers[idx] = worker
+        return worker
+
+    def run(self, services):
+        """
+        Checks `services` on the workers and yields lists of result dicts as
+        each shard completes.
+        """
+        with self._lock:
+            yield from self._run(services)
+
+    def _run(self, services):
+        shards = {}
+        for s in services:
+            shards.setdefault(self._shard(s.get('name', '')), []).append(s)
+
+        pending = {}
+        for idx, shard in shards.items():
+            proc, conn = self._worker(idx)
+            try:
+                conn.send(shard)
+                pending[conn] = (idx, shard)
+            except (OSError, EOFError) as e:
+                self._workers[idx] = None
+                yield self._failed(shard, f"Worker unavailable: {e}")
+
+        deadline = time.monotonic() + self.batch_timeout
+        while pending:
+            ready = wait(list(pending), timeout=max(0, deadline - time.monotonic()))
+            if not ready:
+                for conn, (idx, shard) in pending.items():
+                    self.logger.error(f"Worker {idx} timed out after {self.batch_timeout}s checking "
+                                      f"{len(shard)} services; restarting it")
+                    self._kill(idx)
+                    yield self._failed(shard, f"Worker timed out after {self.batch_timeout}s")
+                break
+            for conn in ready:
+                idx, shard = pending.pop(conn)
+                try:
+                    yield _unpack(conn.recv_bytes())
+                except (OSError, EOFError) as e:
+                    self.logger.error(f"Worker {idx} died while checking {len(shard)} services: {e}")
+                    self._workers[idx] = None
+                    yield self._failed(shard, "Worker process died")
+
+    def _kill(self, idx):
+        worker = self._workers[idx]
+        self._workers[idx] = None
+        if worker is None:
+            return
+        proc, conn = worker
+        proc.terminate()
+        proc.join(timeout=5)
+        conn.close()
+
+    @staticmethod
+    def _failed(shard, message):
+        return [{
+            "name": s.get('name', 'Unknown'),
+            "type": str(s.get('type', 'GENERIC')).upper(),
+            "status": False,
+            "response_time": 0,
+            "message": message,
+            "timestamp": time.time(),
+            "sla_status": "UNKNOWN"
+        } for s in shard]
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        for idx, worker in enumerate(self._workers):
+            if worker is None:
+                continue
+            proc, conn = worker
+            try:
+                conn.send(None)
+                conn.close()
+            except OSError:
+                pass
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+            self._workers[idx] = None
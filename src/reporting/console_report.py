@@ -1,5 +1,9 @@
+import colorama
 from colorama import Fore, Style
 
+# Initialize colorama
+colorama.init()
+
 class ConsoleReporter:
     """
     Generates a readable console summary of the health check results.
@@ -21,9 +25,14 @@ class ConsoleReporter:
         for res in results:
             status_color = Fore.GREEN if res['status'] else Fore.RED
             status_text = "PASS" if res['status'] else "FAIL"
+            if res.get('sla_status') in ('SUPPRESSED', 'UNKNOWN'):
+                status_color = Fore.YELLOW
+                status_text = res['sla_status']
             
             print(f"{res['name']:<30} | {res['type']:<6} | {status_color}{status_text:<10}{Style.RESET_ALL} | {res['response_time']:<8.4f}")
-            if not res['status']:
+            if res.get('sla_status') in ('SUPPRESSED', 'UNKNOWN'):
+                print(f"  {Fore.YELLOW}{res['message']}{Style.RESET_ALL}")
+            elif not res['status']:
                 print(f"  {Fore.RED}Error: {res['message']}{Style.RESET_ALL}")
 
         print("-" * 60)
@@ -1,47 +1,186 @@
 import os
-from jinja2 import Environment, FileSystemLoader
+import threading
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, select_autoescape
+from markupsafe import Markup
 import time
 
-class HtmlReporter:
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+# None = Jinja's own per-user cache directory (created 0700, owner checked);
+# False disables the on-disk cache.
+DEFAULT_BYTECODE_CACHE_DIR = None
+
+# Environments are expensive to build (loader, compiled template cache), so we
+# keep one per (template_dir, bytecode_cache_dir) for the process lifetime.
+_ENVIRONMENTS = {}
+_ENV_LOCK = threading.Lock()
+
+
+def get_environment(template_dir=TEMPLATE_DIR, bytecode_cache_dir=DEFAULT_BYTECODE_CACHE_DIR):
     """
-    Generates a rich HTML dasboard using Jinja2 templates.
+    Returns the shared Jinja2 Environment for a template directory.
+    Compiled templates are cached in memory and, as bytecode, on disk so that
+    fresh processes (CLI runs) skip template compilation too. An explicit
+    `bytecode_cache_dir` must be private to the current user; bytecode is
+    loaded from it, so a directory anyone else can write to is refused.
     """
+    key = (template_dir, bytecode_cache_dir)
+    env = _ENVIRONMENTS.get(key)
+    if env is not None:
+        return env
 
-    def __init__(self, output_dir='reports', template_dir='src/reporting/templates'):
-        self.output_dir = output_dir
-        self.template_dir = template_dir
-        os.makedirs(self.output_dir, exist_ok=True)
-        # We assume the template exists.
-        self.env = Environment(loader=FileSystemLoader(os.getcwd())) # Loading relative to CWD for simplicity
+    with _ENV_LOCK:
+        env = _ENVIRONMENTS.get(key)
+        if env is None:
+            bytecode_cache = None
+            try:
+                if bytecode_cache_dir is None:
+                    bytecode_cache = FileSystemBytecodeCache()
+                elif bytecode_cache_dir:
+                    os.makedirs(bytecode_cache_dir, mode=0o700, exist_ok=True)
+                    st = os.stat(bytecode_cache_dir)
+                    if st.st_uid != os.getuid() or st.st_mode & 0o022:
+                        raise OSError(f"{bytecode_cache_dir} is not private to this user")
+                    bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+            except (OSError, RuntimeError):
+                bytecode_cache = None # Read-only FS or unsafe dir: in-memory cache only
+            env = Environment(loader=FileSystemLoader(template_dir),
+                              autoescape=select_autoescape(['html']),
+                              bytecode_cache=bytecode_cache,
+                              auto_reload=False)
+            _ENVIRONMENTS[key] = env
+    return env
+
+
+class DashboardRenderer:
+    """
+    Renders the dashboard page from per-service row fragments.
+
+    Each service row is rendered once and cached together with a signature of
+    the fields it displays; on later renders only rows whose state changed are
+    re-rendered. Every change bumps a version counter so clients can ask for
+    the fragments changed since the version they already have.
+
+    Volatile values (latency, message) are kept out of the cached fragments:
+    they are rendered next to them by the page and patched client-side from
+    live_values(), so latency jitter does not invalidate the cache.
+    """
+
+    PAGE_TEMPLATE = 'dashboard.html'
+    ROW_TEMPLATE = '_service_row.html'
+
+    def __init__(self, template_dir=TEMPLATE_DIR, bytecode_cache_dir=DEFAULT_BYTECODE_CACHE_DIR):
+        self.env = get_environment(template_dir, bytecode_cache_dir)
+        self.version = 0
+        self._rows = {} # Key: ServiceName, Value: (signature, html, version)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _signature(result):
+        return (result['type'], result['status'], result.get('sla_status'))
+
+    @staticmethod
+    def live_values(results):
+        """Returns {service_name: {response_time, message}} for client-side patching."""
+        return {r['name']: {"response_time": r['response_time'], "message": r['message']} for r in results}
+
+    def render_rows(self, results):
+        """
+        Returns the row HTML for each result, re-rendering only changed rows.
+        """
+        row_template = self.env.get_template(self.ROW_TEMPLATE)
+        rows = []
+        for result in results:
+            name = result['name']
+            signature = self._signature(result)
+            cached = self._rows.get(name)
+            if cached is None or cached[0] != signature:
+                html = Markup(row_template.render(result=result))
+                with self._lock:
+                    self.version += 1
+                    cached = (signature, html, self.version)
+                    self._rows[name] = cached
+            rows.append(cached[1])
+        return rows
+
+    def changed_since(self, results, since):
+        """
+        Renders the given results and returns {service_name: html} for the rows
+        that changed after `since`, plus the current version.
+        """
+        self.render_rows(results)
+        changed = {}
+        for result in results:
+            cached = self._rows.get(result['name'])
+            if cached is not None and cached[2] > since:
+                changed[result['name']] = str(cached[1])
+        return changed, self.version
+
+    def forget(self, names):
+        """Drops cached rows for services that no longer exist."""
+        with self._lock:
+            for name in names:
+                self._rows.pop(name, None)
+
+    def render_page(self, results, title, generated_at, page=1, page_size=None, counts=None):
+        """
+        Renders the full dashboard. With `page_size`, only the rows of the
+        requested page are rendered; the summary still covers all results.
+        If `counts` (total, failed) is given, `results` is already that page
+        (e.g. read from latest_status) and is not sliced again.
+        """
+        if counts is not None:
+            total, failed = counts
+        else:
+            total = len(results)
+            failed = sum(1 for r in results if not r['status'] and r.get('sla_status') != 'UNKNOWN')
+
+        pagination = None
+        visible = results
+        if page_size:
+            pages = max(1, (total + page_size - 1) // page_size)
+            page = min(max(1, page), pages)
+            if counts is None:
+                visible = results[(page - 1) * page_size:page * page_size]
+            pagination = {"page": page, "pages": pages, "page_size": page_size, "total": total}
+
+        rows = [{"name": r['name'], "html": html, "response_time": r['response_time'], "message": r['message']}
+                for r, html in zip(visible, self.render_rows(visible))]
 
-    def generate_report(self, results):
-        template_path = os.path.join('src', 'reporting', 'templates', 'dashboard.html')
-        
-        # Calculate summary stats
-        total = len(results)
-        passed = sum(1 for r in results if r['status'])
-        failed = total - passed
-        
         context = {
-            "title": "Middleware Health Monitor",
-            "generated_at": time.ctime(),
-            "results": results,
+            "title": title,
+            "generated_at": generated_at,
+            "rows": rows,
+            "version": self.version,
+            "pagination": pagination,
             "summary": {
                 "total": total,
-                "passed": passed,
+                "passed": total - failed,
                 "failed": failed,
                 "status_class": "success" if failed == 0 else "danger"
             }
         }
+        return self.env.get_template(self.PAGE_TEMPLATE).render(context)
+
+
+class HtmlReporter:
+    """
+    Generates a rich HTML dasboard using Jinja2 templates.
+    """
+
+    def __init__(self, output_dir='reports', template_dir=TEMPLATE_DIR,
+                 bytecode_cache_dir=DEFAULT_BYTECODE_CACHE_DIR):
+        self.output_dir = output_dir
+        self.template_dir = template_dir
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.renderer = DashboardRenderer(template_dir, bytecode_cache_dir)
+
+    def generate_report(self, results):
+        html_content = self.renderer.render_page(results,
+                                                 title="Middleware Health Monitor",
+                                                 generated_at=time.ctime())
 
-        # Load template
-        # Note: FileSystemLoader root is cwd, so we pass the full relative path
-        template = self.env.get_template(template_path.replace('\\', '/')) 
-        
-        html_content = template.render(context)
-        
         output_file = os.path.join(self.output_dir, 'dashboard.html')
         with open(output_file, 'w') as f:
             f.write(html_content)
-            
+
         return output_file
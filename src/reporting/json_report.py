@@ -1,31 +1,204 @@
+import gzip
 import json
 import os
+import sys
+import tempfile
 import time
 
+# One shared compact encoder: json.dumps() with non-default options builds a
+# new JSONEncoder on every call, and results are encoded once per check.
+# `default=str` keeps odd config values (dates, Decimals from YAML) from
+# breaking a whole report.
+_ENCODER = json.JSONEncoder(separators=(',', ':'), default=str)
+encode = _ENCODER.encode
+
+# Fields every result carries, in the order they are written.
+RESULT_FIELDS = ('name', 'type', 'status', 'response_time', 'message', 'timestamp')
+
+# mkstemp() creates files 0600. A published file keeps the mode of the file
+# it replaces, or gets this one when new (readable by the web server).
+FILE_MODE = 0o644
+
+
+def encode_result(result):
+    """
+    Encodes one result dict as compact JSON.
+    Core result fields come first in a fixed order so lines diff and grep well.
+    """
+    ordered = {key: result[key] for key in RESULT_FIELDS if key in result}
+    if len(ordered) != len(result):
+        for key, value in result.items():
+            if key not in ordered:
+                ordered[key] = value
+    return encode(ordered)
+
+
+def atomic_write(path, data, compress=False):
+    """
+    Writes `data` to a temp file next to `path` and renames it into place, so
+    readers only ever see the previous or the new complete file.
+    """
+    directory = os.path.dirname(path) or '.'
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except OSError:
+        mode = FILE_MODE
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        if hasattr(os, 'fchmod'):
+            os.fchmod(fd, mode)
+        with os.fdopen(fd, 'wb') as f:
+            payload = data.encode('utf-8')
+            if compress:
+                payload = gzip.compress(payload)
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class NdjsonStreamWriter:
+    """
+    Streams results as newline-delimited JSON, one line per result, flushed as
+    soon as each check completes.
+
+    When writing to a path, lines go to '<path>.part' (which can be tailed while
+    the run is in progress) and the file is renamed into place on close(). If
+    the run fails, the '.part' file is left as is and the previous file stays
+    published. '-' writes to stdout.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        if path == '-':
+            self._file = sys.stdout
+            self._part_path = None
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._part_path = path + '.part'
+            self._file = open(self._part_path, 'w', encoding='utf-8')
+
+    def write(self, result):
+        self._file.write(encode_result(result))
+        self._file.write('\n')
+        self._file.flush()
+        self.count += 1
+
+    def close(self, publish=True):
+        if self._part_path is None:
+            return
+        if not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            if publish:
+                os.replace(self._part_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(publish=exc_type is None)
+
+
 class JsonReporter:
     """
     Exports health check results to a JSON file.
+
+    The latest snapshot is published atomically to latest_health.json. Each run
+    is also archived as a timestamped (optionally gzipped) file under
+    `<output_dir>/history`, rotated by count, total size and age.
     """
 
-    def __init__(self, output_dir='reports'):
+    def __init__(self, output_dir='reports', keep_history=True, compress_history=True,
+                 history_max_files=500, history_max_bytes=50 * 1024 * 1024, history_max_age_days=7):
         self.output_dir = output_dir
+        self.history_dir = os.path.join(output_dir, 'history')
+        self.keep_history = keep_history
+        self.compress_history = compress_history
+        self.history_max_files = history_max_files
+        self.history_max_bytes = history_max_bytes
+        self.history_max_age_days = history_max_age_days
         os.makedirs(self.output_dir, exist_ok=True)
 
+    def stream(self, path):
+        """
+        Returns an NdjsonStreamWriter; pass its `write` as the engine's
+        `on_result` callback to emit results as they complete.
+        """
+        return NdjsonStreamWriter(path)
+
     def generate_report(self, results):
         """
-        Writes results to results.json (overwriting previous by default for latest status,
-        or unique name if preferred. For this tool, we keep a 'latest' file and a timestamped one).
+        Writes results to latest_health.json and archives a timestamped copy.
         """
-        report_data = {
-            "timestamp": time.time(),
-            "generated_at": time.ctime(),
-            "services_checked": len(results),
-            "results": results
-        }
+        now = time.time()
+        body = ','.join(encode_result(r) for r in results)
+        header = encode({
+            "timestamp": now,
+            "generated_at": time.ctime(now),
+            "services_checked": len(results)
+        })
+        content = header[:-1] + ',"results":[' + body + ']}'
 
         # Save latest
         latest_path = os.path.join(self.output_dir, 'latest_health.json')
-        with open(latest_path, 'w') as f:
-            json.dump(report_data, f, indent=4)
+        atomic_write(latest_path, content)
+
+        if self.keep_history:
+            self._archive(content, now)
 
         return latest_path
+
+    def _archive(self, content, now):
+        os.makedirs(self.history_dir, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(now)) + f"-{int((now % 1) * 1e6):06d}"
+        name = f"health-{stamp}.json" + ('.gz' if self.compress_history else '')
+        atomic_write(os.path.join(self.history_dir, name), content, compress=self.compress_history)
+        self._rotate(now)
+
+    def _rotate(self, now):
+        """
+        Deletes archived reports that are too old, then the oldest ones until
+        both the file count and total size limits are met.
+        """
+        entries = []
+        with os.scandir(self.history_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.startswith('health-'):
+                    st = entry.stat()
+                    entries.append((entry.name, entry.path, st.st_size, st.st_mtime))
+        entries.sort() # Timestamped names sort chronologically
+
+        max_age = self.history_max_age_days * 86400 if self.history_max_age_days else None
+        total = sum(e[2] for e in entries)
+        keep = []
+        for name, path, size, mtime in entries:
+            if max_age is not None and now - mtime > max_age:
+                self._remove(path)
+                total -= size
+            else:
+                keep.append((path, size))
+
+        # Never delete the archive that was just written
+        while len(keep) > 1 and ((self.history_max_files and len(keep) > self.history_max_files) or
+                        (self.history_max_bytes and total > self.history_max_bytes)):
+            path, size = keep.pop(0)
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,167 @@
+import csv
+import io
+import json
+import math
+from src.topology import get_dependencies
+from src.monitor.registry import registry
+from src.utils.streaming import csv_chunks, ndjson_chunks
+
+# Column order for CSV import/export
+SERVICE_FIELDS = ('name', 'type', 'endpoint', 'sla_threshold', 'depends_on')
+
+FORMATS = ('json', 'ndjson', 'csv', 'yaml')
+
+
+def detect_format(filename=None, content_type=None):
+    """
+    Guesses the import format from a file extension or Content-Type.
+    Defaults to JSON.
+    """
+    hint = (filename or '').lower()
+    for ext, fmt in (('.ndjson', 'ndjson'), ('.jsonl', 'ndjson'), ('.csv', 'csv'),
+                     ('.yaml', 'yaml'), ('.yml', 'yaml'), ('.json', 'json')):
+        if hint.endswith(ext):
+            return fmt
+    content_type = (content_type or '').lower()
+    for marker, fmt in (('ndjson', 'ndjson'), ('csv', 'csv'), ('yaml', 'yaml')):
+        if marker in content_type:
+            return fmt
+    return 'json'
+
+
+def parse_services(text, fmt):
+    """
+    Parses an import payload into a list of raw service dicts.
+
+    JSON/YAML accept either a list of services or a document with a
+    `services` list (so services.yaml can be imported as is). CSV needs a
+    header row; NDJSON is one service object per line.
+    Raises ValueError on malformed input.
+    """
+    if fmt == 'csv':
+        return [dict(row) for row in csv.DictReader(io.StringIO(text))]
+    if fmt == 'ndjson':
+        try:
+            return [json.loads(line) for line in text.splitlines() if line.strip()]
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid NDJSON: {e}")
+    if fmt == 'yaml':
+        import yaml
+        try:
+            data = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid YAML: {e}")
+    elif fmt == 'json':
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+    else:
+        raise ValueError(f"Unsupported format '{fmt}'")
+
+    if isinstance(data, dict):
+        data = data.get('services')
+    if not isinstance(data, list):
+        raise ValueError("Expected a list of services (or a document with a 'services' list)")
+    return data
+
+
+def normalize_service(raw, known_types=None):
+    """
+    Validates one raw service and returns it in the services table shape
+    (name, type, endpoint, sla_threshold, depends_on). Raises ValueError.
+    """
+    if not isinstance(raw, dict):
+        raise ValueError("Service entry must be an object")
+    name = str(raw.get('name') or '').strip()
+    if not name:
+        raise ValueError("'name' is required")
+
+    s_type = str(raw.get('type') or '').strip().upper()
+    known_types = known_types if known_types is not None else registry.types()
+    if s_type not in known_types:
+        raise ValueError(f"unknown type '{s_type}' (expected one of {', '.join(known_types)})")
+
+    # Same key precedence as the YAML migration
+    endpoint = raw.get('endpoint') or raw.get('url') or raw.get('wsdl') or raw.get('queue_name')
+    endpoint = str(endpoint or '').strip()
+    if not endpoint:
+        raise ValueError("'endpoint' (or url/wsdl/queue_name) is required")
+
+    sla = raw.get('sla_threshold')
+    try:
+        sla = 1.0 if sla in (None, '') else float(sla)
+    except (TypeError, ValueError):
+        raise ValueError(f"sla_threshold must be a number, got '{sla}'")
+    if not math.isfinite(sla) or sla <= 0:
+        raise ValueError("sla_threshold must be a positive finite number")
+
+    deps = raw.get('depends_on')
+    if deps is not None and not isinstance(deps, str) and not (
+            isinstance(deps, list) and all(isinstance(d, str) for d in deps)):
+        raise ValueError("depends_on must be a service name or a list of service names")
+    depends_on = get_dependencies(raw)
+    if name in depends_on:
+        raise ValueError("a service cannot depend on itself")
+
+    return {
+        "name": name,
+        "type": s_type,
+        "endpoint": endpoint,
+        "sla_threshold": sla,
+        "depends_on": depends_on
+    }
+
+
+def validate_services(raw_services):
+    """
+    Normalizes a list of raw services. Returns (services, errors) where
+    errors are {"index", "name", "error"} dicts; duplicates of a name
+    earlier in the payload are errors too.
+    """
+    known_types = registry.types()
+    services, errors, seen = [], [], set()
+    for idx, raw in enumerate(raw_services):
+        try:
+            service = normalize_service(raw, known_types)
+            if service['name'] in seen:
+                raise ValueError("duplicate name in payload")
+            seen.add(service['name'])
+            services.append(service)
+        except ValueError as e:
+            name = raw.get('name') if isinstance(raw, dict) else None
+            errors.append({"index": idx, "name": name, "error": str(e)})
+    return services, errors
+
+
+def import_services(db, raw_services, dry_run=False):
+    """
+    Validates and bulk-upserts services in one transaction.
+
+    All-or-nothing: if any entry is invalid nothing is written. Returns a
+    report with created/updated/unchanged names, errors, their `counts` and
+    `applied`.
+    """
+    services, errors = validate_services(raw_services)
+    dry_run = dry_run or bool(errors) # Still diff the valid entries so the report is useful
+
+    diff = db.bulk_upsert_services(services, dry_run=dry_run)
+    if diff is None:
+        diff = {"created": [], "updated": [], "unchanged": []}
+        errors.append({"index": None, "name": None, "error": "Database error, nothing was written"})
+    diff['errors'] = errors
+    diff['applied'] = not dry_run and not errors
+    diff['counts'] = {key: len(diff[key]) for key in ('created', 'updated', 'unchanged', 'errors')}
+    return diff
+
+
+def export_csv(services):
+    """Returns the services as streamed CSV chunks (importable with parse_services)."""
+    return csv_chunks(SERVICE_FIELDS, (
+        [s['name'], s['type'], s['endpoint'], s['sla_threshold'], ','.join(s['depends_on'])]
+        for s in services))
+
+
+def export_ndjson(services):
+    """Returns the services as streamed NDJSON chunks (importable with parse_services)."""
+    return ndjson_chunks(services)
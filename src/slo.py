@@ -0,0 +1,268 @@
+import threading
+import time
+
+# Ring layout: name -> (bucket width in seconds, number of buckets)
+RINGS = {
+    '1h': (60, 60),
+    '6h': (300, 72),
+    '30d': (3600, 720),
+}
+
+# Reported windows: name -> (ring, trailing buckets or None for the whole ring).
+# The short burn-rate windows are read from the tail of a longer ring.
+WINDOWS = {
+    '5m': ('1h', 5),
+    '30m': ('6h', 6),
+    '1h': ('1h', None),
+    '6h': ('6h', None),
+    '30d': ('30d', None),
+}
+
+# Multi-window burn-rate rules (Google SRE workbook): a rule fires when the
+# error budget burns faster than `burn` over both the long and short window.
+DEFAULT_RULES = [
+    {"name": "fast-burn", "long": "1h", "short": "5m", "burn": 14.4},
+    {"name": "slow-burn", "long": "6h", "short": "30m", "burn": 6.0},
+]
+
+
+class _Ring:
+    """
+    Fixed-size ring of time buckets holding (checks, up, fast) counters plus
+    running totals over the whole ring. Adding a result is O(1); advancing
+    time resets each expired bucket once, so it is amortized O(1) too.
+    """
+
+    __slots__ = ('width', 'size', 'head', 'epochs', 'counts', 'totals')
+
+    def __init__(self, width, size):
+        self.width = width
+        self.size = size
+        self.head = None # Bucket index of the newest bucket
+        self.epochs = [-1] * size
+        self.counts = [[0, 0, 0] for _ in range(size)]
+        self.totals = [0, 0, 0]
+
+    def _advance(self, idx):
+        if self.head is None:
+            self.head = idx
+            return
+        if idx <= self.head:
+            return
+        for step in range(self.head + 1, min(idx, self.head + self.size) + 1):
+            slot = step % self.size
+            bucket = self.counts[slot]
+            for k in range(3):
+                self.totals[k] -= bucket[k]
+                bucket[k] = 0
+            self.epochs[slot] = step
+        self.head = idx
+
+    def add(self, ts, up, fast):
+        self.add_counts(int(ts // self.width), 1, up, fast)
+
+    def add_counts(self, idx, checks, up, fast):
+        """Adds pre-aggregated counters to bucket `idx` (timestamp // width)."""
+        self._advance(idx)
+        if idx <= self.head - self.size:
+            return # Older than the ring covers
+        slot = idx % self.size
+        if self.epochs[slot] != idx:
+            self.epochs[slot] = idx
+            self.counts[slot] = [0, 0, 0]
+        bucket = self.counts[slot]
+        for k, v in enumerate((checks, up, fast)):
+            bucket[k] += v
+            self.totals[k] += v
+
+    def read(self, now, last=None):
+        """Returns (checks, up, fast) over the ring, or its `last` newest buckets."""
+        idx = int(now // self.width)
+        self._advance(idx)
+        if last is None:
+            return tuple(self.totals)
+        sums = [0, 0, 0]
+        for step in range(idx - last + 1, idx + 1):
+            slot = step % self.size
+            if self.epochs[slot] == step:
+                for k in range(3):
+                    sums[k] += self.counts[slot][k]
+        return tuple(sums)
+
+
+class ServiceSlo:
+    """
+    Rolling SLI counters of one service.
+    """
+
+    def __init__(self, availability, latency):
+        self.availability = availability # Objectives as ratios (0.999)
+        self.latency = latency
+        self.rings = {name: _Ring(width, size) for name, (width, size) in RINGS.items()}
+
+    def record(self, ts, up, fast):
+        for ring in self.rings.values():
+            ring.add(ts, up, fast)
+
+    def window(self, name, now):
+        ring, last = WINDOWS[name]
+        return self.rings[ring].read(now, last)
+
+
+def _ratio(part, whole):
+    return part / whole if whole else None
+
+
+def _burn(good_ratio, objective):
+    """How many times faster than allowed the error budget is being spent."""
+    if good_ratio is None:
+        return None
+    return (1.0 - good_ratio) / max(1.0 - objective, 1e-9)
+
+
+class SloTracker:
+    """
+    Incremental SLO engine: per service availability (UP checks / checks)
+    and latency compliance (checks within the SLA threshold / UP checks)
+    over 5m, 30m, 1h, 6h and 30d, with error budget and multi-window
+    burn-rate alerts. Nothing is re-read from history after warm-up.
+
+    Config (the `slo` section of services.yaml, percentages):
+        availability: 99.9
+        latency: 99.0
+        min_checks: 10        # long-window checks needed before a rule can fire
+        rules: [{name: fast-burn, long: 1h, short: 5m, burn: 14.4}, ...]
+    A service can override the objectives with its own `slo:` mapping.
+    """
+
+    def __init__(self, availability=99.9, latency=99.0, rules=None, min_checks=10):
+        self.availability = availability / 100.0
+        self.latency = latency / 100.0
+        self.rules = rules or DEFAULT_RULES
+        self.min_checks = min_checks
+        self._services = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        config = config or {}
+        return cls(availability=config.get('availability', 99.9),
+                   latency=config.get('latency', 99.0),
+                   rules=config.get('rules'),
+                   min_checks=config.get('min_checks', 10))
+
+    def _service(self, name, config=None):
+        slo = self._services.get(name)
+        if slo is None:
+            slo = self._services[name] = ServiceSlo(self.availability, self.latency)
+        overrides = (config or {}).get('slo')
+        if overrides:
+            slo.availability = overrides.get('availability', self.availability * 100) / 100.0
+            slo.latency = overrides.get('latency', self.latency * 100) / 100.0
+        return slo
+
+    def record(self, result):
+        """
+        Adds one check result. Suppressed results are not counted: the
+        outage is charged to the upstream that caused it. Neither are
+        UNKNOWN ones (the service was not checked).
+        """
+        if result.get('sla_status') in ('SUPPRESSED', 'UNKNOWN'):
+            return
+        up = 1 if result['status'] else 0
+        fast = 1 if up and result.get('sla_status') != 'DEGRADED' else 0
+        with self._lock:
+            self._service(result['name'], result.get('config')).record(result['timestamp'], up, fast)
+
+    def warm(self, fetch, now=None):
+        """
+        Primes the counters from history, e.g. after a restart. History is
+        read pre-aggregated, one query per ring: `fetch(width, start)` must
+        return (service_name, bucket_index, checks, up, fast) rows for the
+        checks since `start` in buckets of `width` seconds (see
+        Database.get_sli_buckets).
+        """
+        now = now or time.time()
+        for ring, (width, size) in RINGS.items():
+            rows = fetch(width, (int(now // width) - size + 1) * width)
+            with self._lock:
+                for name, idx, checks, up, fast in rows:
+                    self._service(name).rings[ring].add_counts(idx, checks, up or 0, fast or 0)
+
+    def forget(self, names):
+        with self._lock:
+            for name in names:
+                self._services.pop(name, None)
+
+    def evaluate(self, name, now=None):
+        """
+        Returns the burn-rate rules of a service as dicts with `firing`,
+        for both SLIs (rule names are prefixed with the SLI).
+        """
+        now = now or time.time()
+        with self._lock:
+            slo = self._services.get(name)
+            if slo is None:
+                return []
+            alerts = []
+            for rule in self.rules:
+                long_counts = slo.window(rule['long'], now)
+                short_counts = slo.window(rule['short'], now)
+                for sli, objective, part, whole in (('availability', slo.availability, 1, 0),
+                                                    ('latency', slo.latency, 2, 1)):
+                    long_burn = _burn(_ratio(long_counts[part], long_counts[whole]), objective)
+                    short_burn = _burn(_ratio(short_counts[part], short_counts[whole]), objective)
+                    firing = (long_counts[whole] >= self.min_checks
+                              and long_burn is not None and short_burn is not None
+                              and long_burn >= rule['burn'] and short_burn >= rule['burn'])
+                    alerts.append({
+                        "rule": f"{sli}-{rule['name']}",
+                        "firing": firing,
+                        "long_window": rule['long'],
+                        "short_window": rule['short'],
+                        "long_burn_rate": long_burn,
+                        "short_burn_rate": short_burn,
+                        "threshold": rule['burn']
+                    })
+            return alerts
+
+    def snapshot(self, names=None, now=None):
+        """
+        Returns the SLO state of every (or the named) service: per-window
+        compliance and burn rates, 30d error budget left and firing rules.
+        """
+        now = now or time.time()
+        with self._lock:
+            selected = sorted(names if names is not None else self._services)
+        report = []
+        for name in selected:
+            with self._lock:
+                slo = self._services.get(name)
+                if slo is None:
+                    continue
+                counts = {w: slo.window(w, now) for w in WINDOWS}
+            windows = {}
+            for w, (checks, up, fast) in counts.items():
+                availability = _ratio(up, checks)
+                latency = _ratio(fast, up)
+                windows[w] = {
+                    "checks": checks,
+                    "availability": availability,
+                    "latency_compliance": latency,
+                    "availability_burn_rate": _burn(availability, slo.availability),
+                    "latency_burn_rate": _burn(latency, slo.latency)
+                }
+            month = windows['30d']
+            report.append({
+                "name": name,
+                "objectives": {"availability": slo.availability, "latency": slo.latency},
+                "windows": windows,
+                "error_budget_remaining": {
+                    "availability": None if month['availability_burn_rate'] is None
+                    else 1.0 - month['availability_burn_rate'],
+                    "latency": None if month['latency_burn_rate'] is None
+                    else 1.0 - month['latency_burn_rate']
+                },
+                "alerts": [a['rule'] for a in self.evaluate(name, now) if a['firing']]
+            })
+        return report
@@ -0,0 +1,51 @@
+from src.utils.logger import get_logger
+
+logger = get_logger("Topology")
+
+
+def get_dependencies(service):
+    """
+    Returns the upstream service names declared in `depends_on`
+    (a single name or a list of names).
+    """
+    deps = service.get('depends_on') or []
+    if isinstance(deps, str):
+        deps = [d.strip() for d in deps.split(',')]
+    return [d for d in deps if d]
+
+
+def build_layers(services):
+    """
+    Orders services into layers so every service comes after its upstreams
+    (Kahn's algorithm). Services in one layer can be checked in parallel.
+
+    Dependencies on services outside the list are ignored here (their last
+    known status is still used for suppression). Services caught in a
+    dependency cycle are logged and checked together in a final layer.
+    """
+    by_name = {s['name']: s for s in services}
+    pending = {}
+    dependents = {name: [] for name in by_name}
+    for s in services:
+        deps = [d for d in get_dependencies(s) if d in by_name and d != s['name']]
+        pending[s['name']] = len(deps)
+        for d in deps:
+            dependents[d].append(s['name'])
+
+    layers = []
+    ready = [name for name, n in pending.items() if n == 0]
+    while ready:
+        layers.append([by_name[name] for name in ready])
+        next_ready = []
+        for name in ready:
+            del pending[name]
+            for child in dependents[name]:
+                pending[child] -= 1
+                if pending[child] == 0:
+                    next_ready.append(child)
+        ready = next_ready
+
+    if pending:
+        logger.warning(f"Dependency cycle between services: {', '.join(sorted(pending))}")
+        layers.append([by_name[name] for name in pending])
+    return layers
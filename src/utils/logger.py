@@ -2,10 +2,6 @@ import logging
 import os
 import sys
 from logging.handlers import RotatingFileHandler
-import colorama
-
-# Initialize colorama
-colorama.init()
 
 class EnterpriseLogger:
     """
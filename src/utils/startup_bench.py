@@ -0,0 +1,123 @@
+"""
+Cold-start benchmark for the CLI.
+
+Launches fresh interpreters and measures:
+  1. the import time of `src.main` (via `python -X importtime`),
+  2. the wall time of a full `python -m src.main --lean` run against a
+     simulated service (no network, no DB).
+
+It also fails if heavy modules that a lean run must never load show up.
+
+Usage:
+    python -m src.utils.startup_bench --runs 5 --max-import-ms 150 --max-run-ms 1500
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Modules a lean one-shot run must not import
+FORBIDDEN_MODULES = ('flask', 'jinja2', 'sqlite3', 'requests', 'werkzeug')
+
+BENCH_CONFIG = """services:
+  - name: "Startup Bench Queue"
+    type: "MQ"
+    queue_name: "BENCH.Q"
+    simulation_mode: true
+"""
+
+
+def _parse_importtime(stderr):
+    """
+    Returns (total_import_us, imported_module_names) from `-X importtime` output.
+    """
+    modules = set()
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, _, rest = line.partition(':')
+        parts = rest.split('|')
+        if len(parts) != 3:
+            continue
+        name = parts[2][1:]  # drop the separator space, keep nesting indentation
+        modules.add(name.strip())
+        # Top-level imports are the ones without indentation
+        if not name.startswith(' '):
+            total += int(parts[1])
+    return total, modules
+
+
+def _run(cmd, cwd):
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return proc, elapsed_ms
+
+
+def run_benchmark(runs=5, repo_root=None):
+    """
+    Returns a dict with median import/run timings and any forbidden modules seen.
+    """
+    repo_root = repo_root or os.getcwd()
+    import_times, run_times = [], []
+    loaded = set()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, 'bench.yaml')
+        with open(config_path, 'w') as f:
+            f.write(BENCH_CONFIG)
+
+        for _ in range(runs):
+            proc, _ = _run([sys.executable, '-X', 'importtime', '-c', 'import src.main'], repo_root)
+            if proc.returncode != 0:
+                raise RuntimeError(f"Importing src.main failed: {proc.stderr.strip()}")
+            total_us, modules = _parse_importtime(proc.stderr)
+            import_times.append(total_us / 1000)
+            loaded |= modules
+
+            proc, elapsed_ms = _run([sys.executable, '-X', 'importtime', '-m', 'src.main',
+                                     '--lean', '--config', config_path], repo_root)
+            if proc.returncode != 0:
+                raise RuntimeError(f"Lean run failed ({proc.returncode}): {proc.stdout.strip()}")
+            run_times.append(elapsed_ms)
+            loaded |= _parse_importtime(proc.stderr)[1]
+
+    forbidden = sorted(m for m in loaded if m.split('.')[0] in FORBIDDEN_MODULES)
+    return {
+        "runs": runs,
+        "import_ms": round(statistics.median(import_times), 2),
+        "run_ms": round(statistics.median(run_times), 2),
+        "forbidden_modules": forbidden
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI cold-start benchmark")
+    parser.add_argument('--runs', type=int, default=5, help='Number of cold starts to sample')
+    parser.add_argument('--max-import-ms', type=float, default=None, help='Fail if median import time exceeds this')
+    parser.add_argument('--max-run-ms', type=float, default=None, help='Fail if median lean run time exceeds this')
+    args = parser.parse_args()
+
+    report = run_benchmark(args.runs)
+    print(f"Import src.main  (median of {report['runs']}): {report['import_ms']:.2f} ms")
+    print(f"Lean one-shot run (median of {report['runs']}): {report['run_ms']:.2f} ms")
+
+    failed = False
+    if report['forbidden_modules']:
+        print(f"FAIL: lean path imported {', '.join(report['forbidden_modules'])}")
+        failed = True
+    if args.max_import_ms is not None and report['import_ms'] > args.max_import_ms:
+        print(f"FAIL: import time above budget of {args.max_import_ms} ms")
+        failed = True
+    if args.max_run_ms is not None and report['run_ms'] > args.max_run_ms:
+        print(f"FAIL: run time above budget of {args.max_run_ms} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
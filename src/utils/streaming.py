@@ -0,0 +1,40 @@
+import csv
+import io
+import json
+
+# Rows per chunk handed to a streamed response: large enough to keep the
+# per-chunk overhead low, small enough to keep memory flat.
+EXPORT_CHUNK_ROWS = 500
+
+
+def csv_chunks(header, rows, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Yields CSV text in chunks of `chunk_rows` rows, header first.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    if buffer.getvalue():
+        yield buffer.getvalue()
+
+
+def ndjson_chunks(records, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Yields newline-delimited compact JSON in chunks of `chunk_rows` records.
+    """
+    chunk = []
+    for record in records:
+        chunk.append(json.dumps(record, separators=(',', ':')))
+        if len(chunk) >= chunk_rows:
+            yield '\n'.join(chunk) + '\n'
+            chunk = []
+    if chunk:
+        yield '\n'.join(chunk) + '\n'
@@ -1,11 +1,16 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, Response
+from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, Response, stream_with_context
 from src.utils.logger import get_logger
+from src.utils.streaming import csv_chunks, ndjson_chunks
 from src.engine import MonitorEngine
+from src.topology import get_dependencies
+from src.reporting.html_report import DashboardRenderer
+from src.downsample import downsample_history
+from src import service_io
 from functools import wraps
 import time
 import os
-import csv
-import io
+import threading
+from datetime import datetime
 
 app = Flask(__name__, template_folder='reporting/templates')
 app.secret_key = 'enterprise_secret_key_v2'
@@ -13,6 +18,7 @@ app.secret_key = 'enterprise_secret_key_v2'
 # Global vars
 monitor_engine = None
 service_config = [] 
+dashboard_renderer = DashboardRenderer() # Shared so row fragments stay cached across requests
 
 # --- Auth Decorator ---
 def login_required(f):
@@ -44,30 +50,50 @@ def logout():
 def dashboard():
     """
     Renders the HTML status dashboard.
+    Only the requested page is read from latest_status (kept current by the
+    background check loop), so a page view costs the same for any fleet size.
     """
-    # Reload services from DB to get latest updates
-    current_services = monitor_engine.db.get_services()
-    if not current_services:
-        # Fallback to file config configuration if DB is empty
-        current_services = service_config
+    page, page_size = _dashboard_page()
+    results, total, failed = monitor_engine.db.get_latest_status_page(page, page_size)
 
-    results = monitor_engine.run_checks(current_services)
-    
-    summary = {
-        "total": len(results),
-        "passed": sum(1 for r in results if r['status']),
-        "failed": sum(1 for r in results if not r['status']),
-        "status_class": "success" if all(r['status'] for r in results) else "danger"
-    }
-
-    return render_template('dashboard.html', 
-                         results=results, 
-                         summary=summary,
-                         title="Enterprise Monitor v2.0",
-                         generated_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+    return dashboard_renderer.render_page(results,
+                                          title="Enterprise Monitor v2.0",
+                                          generated_at=time.strftime("%Y-%m-%d %H:%M:%S"),
+                                          page=page,
+                                          page_size=page_size,
+                                          counts=(total, failed))
+
+def _dashboard_page():
+    page = max(1, request.args.get('page', 1, type=int))
+    page_size = min(max(1, request.args.get('page_size', 50, type=int)), 500)
+    return page, page_size
+
+@app.route('/api/dashboard/fragments')
+@login_required
+def api_dashboard_fragments():
+    """
+    Returns the HTML of the service rows on the given page that changed
+    since the given version, plus their current latency/message.
+    """
+    since = request.args.get('since', 0, type=int)
+    page, page_size = _dashboard_page()
+    results, _, _ = monitor_engine.db.get_latest_status_page(page, page_size)
+    fragments, version = dashboard_renderer.changed_since(results, since)
+    return jsonify({
+        "timestamp": time.time(),
+        "version": version,
+        "fragments": fragments,
+        "live": dashboard_renderer.live_values(results)
+    })
 
 @app.route('/api/health')
 def api_health():
+    """
+    Returns the current state recorded by the background check loop (no
+    probes). With ?live=1 it runs all checks now and returns their results.
+    """
+    if request.args.get('live') not in ('1', 'true'):
+        return api_status()
     current_services = monitor_engine.db.get_services() or service_config
     results = monitor_engine.run_checks(current_services)
     return jsonify({
@@ -76,15 +102,54 @@ def api_health():
         "results": results
     })
 
+@app.route('/api/status')
+def api_status():
+    """
+    Returns the latest recorded state of every service without probing,
+    read from the latest_status table.
+    """
+    results = monitor_engine.db.get_latest_status()
+    return jsonify({
+        "timestamp": time.time(),
+        "services": len(results),
+        "results": results
+    })
+
+HISTORY_DEFAULT_RANGE = 24 * 3600
+HISTORY_DEFAULT_POINTS = 200
+HISTORY_MAX_POINTS = 2000
+HISTORY_ROLLUP_FACTOR = 8 # SQL pre-aggregates to points * factor buckets before LTTB
+
 @app.route('/api/history/<path:service_name>')
 def api_history(service_name):
-    history = monitor_engine.db.get_history(service_name, limit=20)
-    return jsonify(history)
+    """
+    Chart data for one service. Without parameters, the last 20 checks.
+    With from/to (epoch or ISO 8601, default: last 24h) and/or points, the
+    range is downsampled on the server to at most `points` points.
+    """
+    args = request.args
+    if not any(k in args for k in ('from', 'to', 'points')):
+        history = monitor_engine.db.get_history(service_name, limit=20)
+        return jsonify(history)
+
+    try:
+        end = _parse_time(args.get('to'), time.time())
+        start = _parse_time(args.get('from'), end - HISTORY_DEFAULT_RANGE)
+        points = int(args.get('points', HISTORY_DEFAULT_POINTS))
+    except ValueError:
+        return jsonify({"error": "from/to must be epoch seconds or ISO 8601, points an integer"}), 400
+    points = max(3, min(points, HISTORY_MAX_POINTS))
+
+    rows = monitor_engine.db.get_history_series(service_name, start, end, points * HISTORY_ROLLUP_FACTOR)
+    return jsonify(downsample_history(rows, points))
 
 @app.route('/metrics')
 def metrics():
-    current_services = monitor_engine.db.get_services() or service_config
-    results = monitor_engine.run_checks(current_services)
+    """
+    Prometheus metrics from the stored current state and the SLO counters.
+    Scrapes never probe, so they add no load or SLO samples.
+    """
+    results = monitor_engine.db.get_latest_status()
     lines = []
     lines.append("# HELP middleware_up Service Reachability Status (1=Up, 0=Down)")
     lines.append("# TYPE middleware_up gauge")
@@ -98,48 +163,197 @@ def metrics():
         lines.append(f'middleware_up{{service="{safe_name}", type="{s_type}"}} {val}')
         lines.append(f'middleware_latency_seconds{{service="{safe_name}", type="{s_type}"}} {r["response_time"]}')
 
+    lines.extend(_slo_metrics(monitor_engine.slo.snapshot([r['name'] for r in results])))
     return "\n".join(lines), 200, {'Content-Type': 'text/plain; charset=utf-8'}
 
+def _slo_metrics(snapshot):
+    """Prometheus lines for the rolling SLO state (windows without checks are omitted)."""
+    gauges = [
+        ("middleware_slo_availability_ratio", "Share of checks UP", 'availability'),
+        ("middleware_slo_latency_compliance_ratio", "Share of UP checks within the SLA threshold", 'latency_compliance'),
+        ("middleware_slo_availability_burn_rate", "Availability error budget burn rate", 'availability_burn_rate'),
+        ("middleware_slo_latency_burn_rate", "Latency error budget burn rate", 'latency_burn_rate'),
+    ]
+    lines = []
+    for metric, help_text, key in gauges:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} gauge")
+        for svc in snapshot:
+            safe_name = svc['name'].replace(' ', '_').replace('(', '').replace(')', '')
+            for window, values in svc['windows'].items():
+                if values[key] is not None:
+                    lines.append(f'{metric}{{service="{safe_name}", window="{window}"}} {values[key]}')
+
+    lines.append("# HELP middleware_slo_error_budget_remaining_ratio Share of the 30d error budget left")
+    lines.append("# TYPE middleware_slo_error_budget_remaining_ratio gauge")
+    lines.append("# HELP middleware_slo_burn_alert Multi-window burn-rate rule firing (1) or not (0)")
+    lines.append("# TYPE middleware_slo_burn_alert gauge")
+    for svc in snapshot:
+        safe_name = svc['name'].replace(' ', '_').replace('(', '').replace(')', '')
+        for sli, value in svc['error_budget_remaining'].items():
+            if value is not None:
+                lines.append(f'middleware_slo_error_budget_remaining_ratio{{service="{safe_name}", sli="{sli}"}} {value}')
+        for rule in monitor_engine.slo.evaluate(svc['name']):
+            lines.append(f'middleware_slo_burn_alert{{service="{safe_name}", rule="{rule["rule"]}"}} {int(rule["firing"])}')
+    return lines
+
+@app.route('/api/slo')
+def api_slo():
+    """
+    Rolling SLO state per service (5m/30m/1h/6h/30d compliance, burn rates,
+    30d error budget, firing burn-rate rules) from in-memory counters.
+    Optional: ?service=<name> (repeatable).
+    """
+    names = request.args.getlist('service') or None
+    report = monitor_engine.slo.snapshot(names)
+    return jsonify({
+        "timestamp": time.time(),
+        "services": len(report),
+        "results": report
+    })
+
+EXPORT_DEFAULT_RANGE = 24 * 3600
+
+def _parse_time(value, default):
+    """
+    Accepts epoch seconds or an ISO 8601 timestamp. Raises ValueError otherwise.
+    """
+    if value is None or value == '':
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+def _export_csv(rows):
+    return csv_chunks(['Service Name', 'Status', 'Response Time (s)', 'Timestamp', 'Epoch'], (
+        [name, 'UP' if status else 'DOWN', response_time,
+         time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts)), ts]
+        for name, status, response_time, ts in rows))
+
+def _export_ndjson(rows):
+    return ndjson_chunks({
+        "service": name,
+        "status": bool(status),
+        "response_time": response_time,
+        "timestamp": ts
+    } for name, status, response_time, ts in rows)
+
 @app.route('/api/export')
 @login_required
 def export_data():
     """
-    Exports current status to CSV.
+    Streams recorded history as CSV (default) or NDJSON.
+
+    Query params:
+        from, to: epoch seconds or ISO 8601 (default: the last 24 hours)
+        service: service name, repeatable (default: all services)
+        format: 'csv' or 'ndjson'
+
+    Rows come straight from the history table; no checks are triggered.
     """
-    current_services = monitor_engine.db.get_services() or service_config
-    results = monitor_engine.run_checks(current_services)
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Header
-    writer.writerow(['Service Name', 'Type', 'Status', 'Response Time (s)', 'SLA Status', 'Message', 'Timestamp'])
-    
-    # Data
-    for r in results:
-        writer.writerow([
-            r['name'], 
-            r['type'], 
-            'UP' if r['status'] else 'DOWN', 
-            r['response_time'], 
-            r.get('sla_status', 'N/A'),
-            r['message'],
-            time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())
-        ])
-        
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({"error": "format must be 'csv' or 'ndjson'"}), 400
+    try:
+        end = _parse_time(request.args.get('to'), time.time())
+        start = _parse_time(request.args.get('from'), end - EXPORT_DEFAULT_RANGE)
+    except ValueError:
+        return jsonify({"error": "from/to must be epoch seconds or ISO 8601"}), 400
+
+    rows = monitor_engine.db.iter_history(start, end, request.args.getlist('service') or None)
+
+    if fmt == 'ndjson':
+        body, mimetype, ext = _export_ndjson(rows), "application/x-ndjson", "ndjson"
+    else:
+        body, mimetype, ext = _export_csv(rows), "text/csv", "csv"
+
+    # No Content-Length: the response is sent with chunked transfer encoding
     return Response(
-        output.getvalue(),
-        mimetype="text/csv",
-        headers={"Content-disposition": "attachment; filename=middleware_report.csv"}
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-disposition": f"attachment; filename=middleware_history.{ext}"}
     )
 
 # --- Settings / Admin Routes ---
 
+SERVICES_PAGE_SIZE = 50
+SERVICES_MAX_PAGE_SIZE = 500
+
+def _services_page():
+    """
+    Reads page/page_size/q/type from the query string and returns
+    (services, pagination) for that page of the services table.
+    """
+    page = max(1, request.args.get('page', 1, type=int))
+    page_size = min(max(1, request.args.get('page_size', SERVICES_PAGE_SIZE, type=int)), SERVICES_MAX_PAGE_SIZE)
+    search = request.args.get('q', '').strip()
+    s_type = request.args.get('type', '').strip().upper()
+    services, total = monitor_engine.db.get_services_page(page, page_size, search, s_type)
+    pages = max(1, (total + page_size - 1) // page_size)
+    pagination = {"page": page, "pages": pages, "page_size": page_size, "total": total,
+                  "q": search, "type": s_type}
+    return services, pagination
+
+@app.route('/api/services')
+@login_required
+def api_services():
+    """Paginated service list. Query params: page, page_size, q (name/endpoint filter), type."""
+    services, pagination = _services_page()
+    return jsonify({"services": services, **pagination})
+
+@app.route('/api/services/bulk', methods=['POST'])
+@login_required
+def api_services_bulk():
+    """
+    Creates/updates many services in one transaction.
+
+    Body: JSON, NDJSON, CSV (header: name,type,endpoint,sla_threshold,depends_on)
+    or YAML (a list, or a services.yaml document).
+    Query params:
+        format: json|ndjson|csv|yaml (default: from Content-Type)
+        dry_run: 1 to only report the diff
+
+    All-or-nothing: any invalid entry rejects the whole batch (HTTP 422);
+    the report still lists what would have changed.
+    """
+    fmt = (request.args.get('format') or service_io.detect_format(content_type=request.content_type)).lower()
+    if fmt not in service_io.FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(service_io.FORMATS)}"}), 400
+    try:
+        raw = service_io.parse_services(request.get_data(as_text=True), fmt)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    dry_run = request.args.get('dry_run', '').lower() in ('1', 'true', 'yes')
+    report = service_io.import_services(monitor_engine.db, raw, dry_run=dry_run)
+    return jsonify(report), (422 if report['errors'] else 200)
+
+@app.route('/api/services/export')
+@login_required
+def api_services_export():
+    """Streams all active services as CSV (default) or NDJSON, re-importable via /api/services/bulk."""
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({"error": "format must be 'csv' or 'ndjson'"}), 400
+
+    services = monitor_engine.db.iter_services()
+    if fmt == 'ndjson':
+        body, mimetype = service_io.export_ndjson(services), "application/x-ndjson"
+    else:
+        body, mimetype = service_io.export_csv(services), "text/csv"
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-disposition": f"attachment; filename=middleware_services.{fmt}"}
+    )
+
 @app.route('/settings')
 @login_required
 def settings():
-    services = monitor_engine.db.get_services()
-    return render_template('settings.html', services=services)
+    services, pagination = _services_page()
+    return render_template('settings.html', services=services, pagination=pagination,
+                           types=monitor_engine.registry.types())
 
 @app.route('/settings/add', methods=['POST'])
 @login_required
@@ -148,15 +362,45 @@ def settings_add():
     s_type = request.form['type']
     endpoint = request.form['endpoint']
     sla = float(request.form.get('sla', 1.0))
-    monitor_engine.db.add_service(name, s_type, endpoint, sla)
+    depends_on = get_dependencies({"depends_on": request.form.get('depends_on', '')})
+    monitor_engine.db.add_service(name, s_type, endpoint, sla, depends_on)
     flash(f'Service {name} added.')
     return redirect(url_for('settings'))
 
+@app.route('/settings/import', methods=['POST'])
+@login_required
+def settings_import():
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        flash('Choose a file to import.')
+        return redirect(url_for('settings'))
+    fmt = service_io.detect_format(filename=upload.filename)
+    try:
+        raw = service_io.parse_services(upload.read().decode('utf-8'), fmt)
+    except (ValueError, UnicodeDecodeError) as e:
+        flash(f'Import failed: {e}')
+        return redirect(url_for('settings'))
+
+    report = service_io.import_services(monitor_engine.db, raw, dry_run=bool(request.form.get('dry_run')))
+    counts = report['counts']
+    summary = f"{counts['created']} created, {counts['updated']} updated, {counts['unchanged']} unchanged"
+    if report['errors']:
+        first = report['errors'][0]
+        flash(f"Import rejected ({counts['errors']} invalid entries, e.g. #{first['index']} {first['name']}: "
+              f"{first['error']}). Would have been: {summary}.")
+    elif report['applied']:
+        flash(f'Import done: {summary}.')
+    else:
+        flash(f'Dry run: {summary}.')
+    return redirect(url_for('settings'))
+
 @app.route('/settings/delete', methods=['POST'])
 @login_required
 def settings_delete():
     name = request.form['name']
     monitor_engine.db.delete_service(name)
+    dashboard_renderer.forget([name])
+    monitor_engine.slo.forget([name])
     flash(f'Service {name} deleted.')
     return redirect(url_for('settings'))
 
@@ -165,21 +409,51 @@ def settings_delete():
 def configure_server(config):
     global monitor_engine, service_config, logger
     service_config = config.get('services', [])
-    monitor_engine = MonitorEngine()
+    execution = config.get('execution') or {}
+    monitor_engine = MonitorEngine(limits=config.get('limits'),
+                                   processes=execution.get('processes', 0),
+                                   alerting=config.get('alerting'),
+                                   slo=config.get('slo'),
+                                   check_interval=execution.get('interval', CHECK_INTERVAL))
     logger = get_logger("WebServer")
     
-    # Auto-Migration: If DB is empty, populate from YAML
-    existing = monitor_engine.db.get_services()
+    # Auto-Migration: If DB is empty, populate from YAML (one transaction)
+    _, existing = monitor_engine.db.get_services_page(page_size=1)
     if not existing and service_config:
         logger.info("Migrating YAML config to Database...")
-        for s in service_config:
-            # Handle different keys for different types
-            endpoint = s.get('url') or s.get('wsdl') or s.get('queue_name') or 'unknown'
-            monitor_engine.db.add_service(s['name'], s['type'].upper(), endpoint, s.get('sla_threshold', 1.0))
+        services, errors = service_io.validate_services(service_config)
+        for err in errors:
+            logger.error(f"Skipping service #{err['index']} ({err['name']}) from YAML: {err['error']}")
+        monitor_engine.db.bulk_upsert_services(services)
+
+    # Prime the SLO counters from the last 30 days once; afterwards they are
+    # updated incrementally by every check.
+    monitor_engine.slo.warm(monitor_engine.db.get_sli_buckets)
 
 app.secret_key = 'super_secret_key' # Required for flash messages
 
+CHECK_INTERVAL = 60 # Seconds between background check cycles (execution.interval)
+
+def _check_loop(interval, stop):
+    """
+    Runs all checks every `interval` seconds. Results land in latest_status,
+    which the dashboard reads; page views never trigger probes.
+    """
+    while not stop.is_set():
+        started = time.time()
+        try:
+            monitor_engine.run_checks(monitor_engine.db.get_services() or service_config)
+        except Exception as e:
+            logger.error(f"Background check cycle failed: {e}")
+        stop.wait(max(0, interval - (time.time() - started)))
+
+def start_check_loop(interval=CHECK_INTERVAL):
+    stop = threading.Event()
+    threading.Thread(target=_check_loop, args=(interval, stop), name="check-loop", daemon=True).start()
+    return stop
+
 def run_server(config, host='0.0.0.0', port=5000):
     configure_server(config)
+    start_check_loop((config.get('execution') or {}).get('interval', CHECK_INTERVAL))
     logger.info(f"Starting Web Server at http://{host}:{port}")
     app.run(host=host, port=port, debug=False)